@@ -5,11 +5,184 @@ import shutil
 import time
 from datetime import datetime
 
-def file_copier(source_path, target_path):
+# 复制引擎参数
+COPY_BUFFER_SIZE = 1024 * 1024           # 缓冲复制时复用的缓冲区大小
+PARALLEL_COPY_THRESHOLD = 64 * 1024 * 1024  # 超过该大小的文件按字节区间并行复制
+PARALLEL_COPY_CHUNK = 32 * 1024 * 1024   # 并行复制时每个字节区间的大小
+
+def _copy_range(source_path, target_path, offset, length, buffer_size=COPY_BUFFER_SIZE):
+    """
+    复制文件中的一个字节区间
+    优先使用 os.copy_file_range（内核内复制），其次 os.sendfile，
+    最后退回到复用同一块缓冲区的 readinto 循环
+    :param source_path: 源文件路径
+    :param target_path: 目标文件路径（必须已存在）
+    :param offset: 区间起始偏移
+    :param length: 区间长度
+    :param buffer_size: 缓冲复制时的缓冲区大小
+    """
+    with open(source_path, 'rb', buffering=0) as f_in, \
+         open(target_path, 'r+b', buffering=0) as f_out:
+        src_fd, dst_fd = f_in.fileno(), f_out.fileno()
+        position = offset
+        end = offset + length
+        
+        # 1. copy_file_range：数据不经过用户态
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while position < end:
+                    copied = os.copy_file_range(src_fd, dst_fd, end - position, position, position)
+                    if copied == 0:
+                        break
+                    position += copied
+                if position >= end:
+                    return length
+            except OSError:
+                pass  # 跨文件系统或不支持时继续尝试其他方式
+        
+        # 2. sendfile：Linux 支持普通文件作为输出
+        if hasattr(os, 'sendfile'):
+            try:
+                f_out.seek(position)
+                while position < end:
+                    sent = os.sendfile(dst_fd, src_fd, position, end - position)
+                    if sent == 0:
+                        break
+                    position += sent
+                if position >= end:
+                    return length
+            except OSError:
+                pass
+        
+        # 3. 缓冲复制：复用同一块缓冲区，避免每次分配新的 bytes 对象
+        buffer = bytearray(min(buffer_size, max(end - position, 1)))
+        view = memoryview(buffer)
+        f_in.seek(position)
+        f_out.seek(position)
+        while position < end:
+            count = f_in.readinto(view[:min(len(buffer), end - position)])
+            if not count:
+                break
+            f_out.write(view[:count])
+            position += count
+        return position - offset
+
+def copy_file(source_path, target_path, overwrite=True, workers=4,
+              threshold=PARALLEL_COPY_THRESHOLD, chunk_size=PARALLEL_COPY_CHUNK):
+    """
+    非交互式文件复制引擎
+    大文件被切分成多个字节区间，由线程池并行复制；复制完成后保留元数据（同 shutil.copy2）
+    :param source_path: 源文件路径
+    :param target_path: 目标文件路径或目标目录
+    :param overwrite: 目标已存在时是否覆盖
+    :param workers: 并行复制的线程数
+    :param threshold: 启用并行复制的文件大小阈值（字节）
+    :param chunk_size: 并行复制时每个字节区间的大小（字节）
+    :return: 复制结果字典（大小、耗时、吞吐量 MB/s）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    if os.path.isdir(target_path):
+        target_path = os.path.join(target_path, os.path.basename(source_path))
+    if os.path.exists(target_path):
+        # 同一个文件（包括硬链接）在打开目标时就会被截断，必须在此之前检查
+        if os.path.samefile(source_path, target_path):
+            raise shutil.SameFileError(f"{source_path} 和 {target_path} 是同一个文件")
+        if not overwrite:
+            raise FileExistsError(f"目标文件 {target_path} 已存在")
+    
+    start_time = time.perf_counter()
+    file_size = os.path.getsize(source_path)
+    
+    # 预先创建目标文件并设定大小，各区间可以独立写入
+    with open(target_path, 'wb') as f_out:
+        f_out.truncate(file_size)
+    
+    if file_size >= threshold and workers > 1:
+        ranges = [(offset, min(chunk_size, file_size - offset))
+                  for offset in range(0, file_size, chunk_size)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_copy_range, source_path, target_path, offset, length)
+                       for offset, length in ranges]
+            copied = sum(future.result() for future in futures)
+    else:
+        copied = _copy_range(source_path, target_path, 0, file_size)
+    
+    if copied != file_size:
+        raise IOError(f"复制不完整：期望 {file_size} 字节，实际 {copied} 字节")
+    shutil.copystat(source_path, target_path)
+    
+    seconds = time.perf_counter() - start_time
+    return {
+        'source': source_path,
+        'target': target_path,
+        'size': file_size,
+        'seconds': seconds,
+        'mb_per_s': file_size / (1024 * 1024) / seconds if seconds > 0 else float('inf')
+    }
+
+def copy_many(pairs, overwrite=True, workers=4):
+    """
+    批量复制文件
+    :param pairs: (源文件路径, 目标文件路径) 的可迭代对象
+    :param overwrite: 目标已存在时是否覆盖
+    :param workers: 同时复制的文件数
+    :return: 每个文件的复制结果列表（失败的条目带有 'error' 字段）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    def copy_one(pair):
+        source_path, target_path = pair
+        try:
+            # 外层已经按文件并行，单个文件内部不再开线程池
+            return copy_file(source_path, target_path, overwrite=overwrite, workers=1)
+        except Exception as e:
+            return {'source': source_path, 'target': target_path, 'error': str(e)}
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(copy_one, pairs))
+
+def benchmark_copier(source_path, repeat=3):
+    """
+    对比 shutil.copy2 与复制引擎的吞吐量
+    :param source_path: 用于测试的源文件路径
+    :param repeat: 每种方式重复的次数（取最快一次）
+    :return: {方式: MB/s}
+    """
+    target_path = f"{source_path}.bench_copy"
+    file_size_mb = os.path.getsize(source_path) / (1024 * 1024)
+    methods = {
+        'shutil.copy2': lambda: shutil.copy2(source_path, target_path),
+        'copy_file': lambda: copy_file(source_path, target_path),
+        'copy_file(单线程)': lambda: copy_file(source_path, target_path, workers=1),
+    }
+    
+    results = {}
+    try:
+        for name, method in methods.items():
+            best = float('inf')
+            for _ in range(repeat):
+                if os.path.exists(target_path):
+                    os.remove(target_path)
+                start_time = time.perf_counter()
+                method()
+                best = min(best, time.perf_counter() - start_time)
+            results[name] = file_size_mb / best if best > 0 else float('inf')
+    finally:
+        if os.path.exists(target_path):
+            os.remove(target_path)
+    
+    print(f"复制性能对比（文件大小：{file_size_mb:.1f} MB）：")
+    for name, speed in results.items():
+        print(f"  {name:<20}{speed:>10.1f} MB/s")
+    return results
+
+def file_copier(source_path, target_path, overwrite=None):
     """
     文件复制器
     :param source_path: 源文件路径
     :param target_path: 目标文件路径
+    :param overwrite: 目标已存在时是否覆盖；None 表示询问用户
     """
     # 检查源文件是否存在
     if not os.path.exists(source_path):
@@ -18,52 +191,101 @@ def file_copier(source_path, target_path):
     
     # 检查目标文件是否已存在
     if os.path.exists(target_path):
-        response = input(f"目标文件 {target_path} 已存在，是否覆盖？(y/n): ")
-        if response.lower() != 'y':
+        if overwrite is None:
+            response = input(f"目标文件 {target_path} 已存在，是否覆盖？(y/n): ")
+            overwrite = response.lower() == 'y'
+        if not overwrite:
             print("操作已取消")
             return
     
-    # 记录开始时间
-    start_time = time.time()
-    
     try:
         # 复制文件
-        shutil.copy2(source_path, target_path)
-        
-        # 获取文件大小
-        file_size = os.path.getsize(target_path)
-        
-        # 计算复制时间
-        end_time = time.time()
-        copy_time = end_time - start_time
+        result = copy_file(source_path, target_path, overwrite=True)
         
         print(f"文件复制完成：")
         print(f"源文件：{source_path}")
-        print(f"目标文件：{target_path}")
-        print(f"文件大小：{file_size} 字节")
-        print(f"复制时间：{copy_time:.2f} 秒")
+        print(f"目标文件：{result['target']}")
+        print(f"文件大小：{result['size']} 字节")
+        print(f"复制时间：{result['seconds']:.2f} 秒")
+        print(f"复制速度：{result['mb_per_s']:.1f} MB/s")
+        return result
     
     except Exception as e:
         print(f"复制过程中发生错误：{str(e)}")
 
+STATS_BLOCK_SIZE = 1024 * 1024  # 流式统计时每次读取的块大小
+LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'  # str.splitlines() 认定的换行符
+
+def count_text_stats(file_path, block_size=STATS_BLOCK_SIZE, encoding='utf-8'):
+    """
+    流式统计文件内容（内存占用与文件大小无关）
+    按固定大小读取二进制块，增量解码并统一换行符，
+    跨块边界的单词和行由状态变量衔接，结果与整体读取后统计一致
+    :param file_path: 文件路径
+    :param block_size: 每次读取的块大小（字节）
+    :param encoding: 文件编码
+    :return: 统计信息字典
+    """
+    import codecs
+    import io
+    
+    # 与文本模式 open() 相同：增量解码 + 通用换行符转换（块尾的 '\r' 会被暂存）
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+    
+    chars = words = lines = blank_lines = 0
+    in_word = False          # 上一块是否以单词字符结尾
+    line_open = False        # 是否存在尚未结束的行
+    line_has_text = False    # 未结束的行中是否出现过非空白字符
+    
+    buffer = bytearray(block_size)
+    view = memoryview(buffer)
+    with open(file_path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            text = decoder.decode(view[:count], final=not count)
+            if text:
+                chars += len(text)
+                
+                # 单词：块首与上一块块尾相连时是同一个单词
+                words += len(text.split())
+                if in_word and not text[0].isspace():
+                    words -= 1
+                in_word = not text[-1].isspace()
+                
+                # 行：与 str.splitlines() 的规则一致
+                for part in text.splitlines(True):
+                    stripped = part.strip()
+                    if part[-1] in LINE_BREAKS:  # 以换行符结尾，行结束
+                        lines += 1
+                        if not (line_has_text or stripped):
+                            blank_lines += 1
+                        line_open = line_has_text = False
+                    else:
+                        line_open = True
+                        line_has_text = line_has_text or bool(stripped)
+            if not count:
+                break
+    
+    if line_open:
+        lines += 1
+        if not line_has_text:
+            blank_lines += 1
+    
+    return {
+        '字符数': chars,
+        '单词数': words,
+        '行数': lines,
+        '空行数': blank_lines
+    }
+
 def file_statistics(file_path):
     """
     文件内容统计器
     :param file_path: 文件路径
     """
     try:
-        # 读取文件内容
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            lines = content.splitlines()
-        
-        # 统计信息
-        stats = {
-            '字符数': len(content),
-            '单词数': len(content.split()),
-            '行数': len(lines),
-            '空行数': len([line for line in lines if not line.strip()])
-        }
+        # 流式统计，不需要把整个文件读入内存
+        stats = count_text_stats(file_path)
         
         # 写入统计结果
         output_file = f"{os.path.splitext(file_path)[0]}_stats.txt"
@@ -82,28 +304,70 @@ def file_statistics(file_path):
         print(f"统计过程中发生错误：{str(e)}")
         return None
 
-def encoding_converter(source_path, target_path, target_encoding):
+def file_statistics_many(paths, workers=None):
+    """
+    多文件并行统计（进程池）
+    :param paths: 文件路径列表
+    :param workers: 进程数，默认为 CPU 核数
+    :return: {'files': {路径: 统计信息}, 'total': 汇总统计, 'errors': {路径: 错误信息}}
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    paths = list(paths)
+    result = {'files': {}, 'total': {'字符数': 0, '单词数': 0, '行数': 0, '空行数': 0}, 'errors': {}}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {path: executor.submit(count_text_stats, path) for path in paths}
+        for path, future in futures.items():
+            try:
+                stats = future.result()
+            except Exception as e:
+                result['errors'][path] = str(e)
+                continue
+            result['files'][path] = stats
+            for key, value in stats.items():
+                result['total'][key] += value
+    return result
+
+def _load_sibling(name):
+    """
+    加载同一目录下的练习模块
+    模块名以数字开头，不能写 import 语句；按文件路径加载，与当前工作目录和 sys.path 无关
+    """
+    import sys
+    import importlib.util
+    
+    if name in sys.modules:
+        return sys.modules[name]
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{name}.py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    try:
+        spec.loader.exec_module(module)
+    except BaseException:
+        del sys.modules[name]
+        raise
+    return module
+
+def encoding_converter(source_path, target_path, target_encoding, decode_errors='strict', encode_errors='strict'):
     """
     文件编码转换器
+    使用 04_file_encoding 中的流式转码器，内存占用与文件大小无关
     :param source_path: 源文件路径
     :param target_path: 目标文件路径
     :param target_encoding: 目标编码格式
+    :param decode_errors: 解码错误处理方式
+    :param encode_errors: 编码错误处理方式
     """
+    source_encoding = None
     try:
-        # 尝试检测源文件编码
-        import chardet
-        with open(source_path, 'rb') as f:
-            raw_data = f.read()
-            result = chardet.detect(raw_data)
-            source_encoding = result['encoding']
+        # 尝试检测源文件编码（大文件只采样检测）
+        file_encoding = _load_sibling('04_file_encoding')
+        source_encoding = file_encoding.detect_encoding(source_path)['encoding']
         
-        # 读取源文件
-        with open(source_path, 'r', encoding=source_encoding) as f:
-            content = f.read()
-        
-        # 写入目标文件
-        with open(target_path, 'w', encoding=target_encoding) as f:
-            f.write(content)
+        # 边读边写
+        file_encoding.transcode_file(source_path, target_path, target_encoding, source_encoding,
+                                     decode_errors, encode_errors)
         
         print(f"编码转换完成：")
         print(f"源文件：{source_path} ({source_encoding})")
@@ -148,56 +412,34 @@ def backup_tool(source_path, backup_dir):
     except Exception as e:
         print(f"备份过程中发生错误：{str(e)}")
 
-def file_monitor(directory, interval=1):
+def file_monitor(directory, interval=1, backend='auto'):
     """
     文件监控器
     :param directory: 要监控的目录
-    :param interval: 监控间隔（秒）
+    :param interval: 监控间隔（秒），仅轮询后端使用
+    :param backend: 事件后端（auto/inotify/polling），auto 在 Linux 上使用 inotify
     """
+    from fs_events import open_event_source
+    
+    labels = {'created': '创建文件', 'deleted': '删除文件'}
     try:
         # 创建日志文件
         log_file = f"file_monitor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
         
-        # 获取初始文件状态
-        initial_files = set()
-        for root, _, files in os.walk(directory):
-            for file in files:
-                file_path = os.path.join(root, file)
-                initial_files.add(file_path)
+        # 创建事件源（inotify 由内核推送变化，无需每次遍历整个目录）
+        source = open_event_source(directory, backend=backend, interval=interval)
         
         print(f"开始监控目录：{directory}")
         print(f"日志文件：{log_file}")
         
-        while True:
-            # 获取当前文件状态
-            current_files = set()
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    current_files.add(file_path)
-            
-            # 检测变化
-            created = current_files - initial_files
-            deleted = initial_files - current_files
-            
-            # 记录变化
-            if created or deleted:
-                with open(log_file, 'a', encoding='utf-8') as f:
-                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                    if created:
-                        f.write(f"[{timestamp}] 创建文件：\n")
-                        for file in created:
-                            f.write(f"  - {file}\n")
-                    if deleted:
-                        f.write(f"[{timestamp}] 删除文件：\n")
-                        for file in deleted:
-                            f.write(f"  - {file}\n")
-            
-            # 更新文件状态
-            initial_files = current_files
-            
-            # 等待下一次检查
-            time.sleep(interval)
+        for event_type, path in source.events():
+            # 只记录创建和删除
+            if event_type not in labels:
+                continue
+            with open(log_file, 'a', encoding='utf-8') as f:
+                timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                f.write(f"[{timestamp}] {labels[event_type]}：\n")
+                f.write(f"  - {path}\n")
     
     except KeyboardInterrupt:
         print("\n监控已停止")
@@ -208,9 +450,12 @@ def file_monitor(directory, interval=1):
 if __name__ == "__main__":
     # 测试文件复制器
     file_copier("test.txt", "test_copy.txt")
+    print(copy_many([("test.txt", "test_copy1.txt"), ("test.txt", "test_copy2.txt")]))
+    benchmark_copier("test.txt")
     
     # 测试文件统计器
     file_statistics("test.txt")
+    print(file_statistics_many(["test.txt", "test_copy.txt"], workers=2)['total'])
     
     # 测试编码转换器
     encoding_converter("test.txt", "test_utf8.txt", "utf-8")
@@ -4,9 +4,135 @@ import os
 import zipfile
 import gzip
 import bz2
+import lzma
 import shutil
 from datetime import datetime
 
+# 可选的第三方压缩库
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+# 流式压缩编解码器注册表：名称 -> 编解码器信息
+# open(path, mode, level) 返回文件对象（读模式时 level 为 None）；
+# compress/decompress 处理完整的独立压缩帧，多个帧直接拼接仍是合法的压缩文件
+CODECS = {}
+
+def register_codec(name, extension, open_func, compress_func, decompress_func, levels, default_level):
+    """
+    注册压缩编解码器
+    :param name: 编解码器名称（compression_tool 的 compression_type）
+    :param extension: 压缩文件扩展名
+    :param open_func: 打开压缩文件的函数
+    :param compress_func: 压缩函数 (data, level) -> bytes
+    :param decompress_func: 解压函数 data -> bytes
+    :param levels: 自动选择时尝试的压缩级别，按从快到慢排列
+    :param default_level: 默认压缩级别
+    """
+    CODECS[name] = {
+        'extension': extension,
+        'open': open_func,
+        'compress': compress_func,
+        'decompress': decompress_func,
+        'levels': levels,
+        'default_level': default_level
+    }
+
+def codec_for_path(file_path):
+    """根据扩展名查找编解码器名称，找不到时返回 None"""
+    for name, codec in CODECS.items():
+        if file_path.endswith(codec['extension']):
+            return name
+    return None
+
+register_codec(
+    'gzip', '.gz',
+    lambda path, mode, level: gzip.open(path, mode, compresslevel=9 if level is None else level),
+    lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+    gzip.decompress, (1, 6, 9), 6)
+register_codec(
+    'bzip2', '.bz2',
+    lambda path, mode, level: bz2.open(path, mode, compresslevel=9 if level is None else level),
+    lambda data, level: bz2.compress(data, compresslevel=level),
+    bz2.decompress, (1, 9), 9)
+register_codec(
+    'xz', '.xz',
+    lambda path, mode, level: lzma.open(path, mode, preset=level if 'w' in mode else None),
+    lambda data, level: lzma.compress(data, preset=level),
+    lzma.decompress, (0, 3, 6), 6)
+
+if zstandard is not None:
+    register_codec(
+        'zstd', '.zst',
+        lambda path, mode, level: zstandard.open(
+            path, mode, cctx=zstandard.ZstdCompressor(level=level) if 'w' in mode else None),
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data),
+        lambda data: zstandard.ZstdDecompressor().stream_reader(data, read_across_frames=True).read(),
+        (1, 3, 9, 19), 3)
+
+if lz4 is not None:
+    register_codec(
+        'lz4', '.lz4',
+        lambda path, mode, level: lz4.frame.open(path, mode, compression_level=0 if level is None else level),
+        lambda data, level: lz4.frame.compress(data, compression_level=level),
+        lz4.frame.decompress, (0, 9), 0)
+
+def choose_codec(file_path, target_mb_s=None, target_ratio=None, sample_size=4*1024*1024):
+    """
+    根据文件开头的样本自动选择编解码器和压缩级别
+    对每个编解码器的候选级别（从快到慢）实际压缩样本，测量压缩比和吞吐量：
+    - 指定 target_ratio：在达到目标压缩比的组合中选最快的
+    - 否则按 target_mb_s（默认 50 MB/s）：在速度达标的组合中选压缩比最高的
+    都不达标时，分别退回压缩比最高或速度最快的组合
+    某个级别已达到压缩比目标（或已低于速度目标）时，同一编解码器更慢的级别不可能被选中，不再测量
+    :param file_path: 文件路径
+    :param target_mb_s: 目标压缩速度（MB/s）
+    :param target_ratio: 目标压缩比（原始大小 / 压缩后大小）
+    :param sample_size: 样本大小（字节）
+    :return: (编解码器名称, 压缩级别, 测量结果列表)
+    """
+    import time
+    
+    with open(file_path, 'rb') as f:
+        sample = f.read(sample_size)
+    
+    if target_ratio is None and target_mb_s is None:
+        target_mb_s = 50
+    
+    measurements = []
+    for name, codec in CODECS.items():
+        for level in codec['levels']:
+            start_time = time.perf_counter()
+            compressed = codec['compress'](sample, level)
+            seconds = max(time.perf_counter() - start_time, 1e-9)
+            measurement = {
+                'codec': name,
+                'level': level,
+                'ratio': len(sample) / max(len(compressed), 1),
+                'mb_per_s': len(sample) / (1024 * 1024) / seconds
+            }
+            measurements.append(measurement)
+            if target_ratio is not None and measurement['ratio'] >= target_ratio:
+                break
+            if target_ratio is None and measurement['mb_per_s'] < target_mb_s:
+                break
+    
+    if target_ratio is not None:
+        candidates = [m for m in measurements if m['ratio'] >= target_ratio]
+        best = max(candidates, key=lambda m: m['mb_per_s']) if candidates \
+            else max(measurements, key=lambda m: m['ratio'])
+    else:
+        candidates = [m for m in measurements if m['mb_per_s'] >= target_mb_s]
+        best = max(candidates, key=lambda m: m['ratio']) if candidates \
+            else max(measurements, key=lambda m: m['mb_per_s'])
+    return best['codec'], best['level'], measurements
+
 def zip_manager(zip_path, password=None):
     """
     ZIP文件管理器
@@ -47,12 +173,188 @@ def zip_manager(zip_path, password=None):
     
     return ZipManager(zip_path, password)
 
-def compression_tool(file_path, compression_type='zip', level=6):
+PARALLEL_BLOCK_SIZE = 4 * 1024 * 1024  # 并行压缩时每个独立压缩块的大小
+
+def _ordered_parallel_map(executor, func, items, window):
+    """
+    按顺序产出 func(item) 的结果，同时最多保留 window 个未完成的任务（限制内存占用）
+    """
+    from collections import deque
+    
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def _read_blocks(file_path, block_size):
+    """按固定大小读取文件块"""
+    with open(file_path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
+
+def parallel_compress_stream(file_path, output_path, compression_type='gzip', level=6,
+                             workers=4, block_size=PARALLEL_BLOCK_SIZE):
+    """
+    多线程压缩单个文件
+    文件被切成独立的块，各块在线程池中压缩（各压缩库压缩时会释放 GIL），
+    按顺序拼接成多成员 gzip 或多流 bzip2/xz/zstd/lz4 文件，对应的命令行工具可以直接解压
+    :param file_path: 源文件路径
+    :param output_path: 输出文件路径
+    :param compression_type: 编解码器名称（见 CODECS）
+    :param level: 压缩级别（1-9）
+    :param workers: 线程数
+    :param block_size: 每个压缩块的大小（字节）
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    if compression_type not in CODECS:
+        raise ValueError(f"不支持的并行压缩类型：{compression_type}")
+    codec = CODECS[compression_type]
+    compress = lambda block: codec['compress'](block, level)
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor, open(output_path, 'wb') as f_out:
+        blocks = _read_blocks(file_path, block_size)
+        for compressed in _ordered_parallel_map(executor, compress, blocks, workers * 2):
+            f_out.write(compressed)
+        if f_out.tell() == 0:
+            # 空文件也要输出一个合法的压缩流
+            f_out.write(compress(b''))
+
+def _dos_datetime(timestamp):
+    """把时间戳转换为 ZIP 使用的 DOS 日期和时间"""
+    t = datetime.fromtimestamp(timestamp)
+    if t.year < 1980:
+        return (0 << 9) | (1 << 5) | 1, 0
+    dos_date = ((t.year - 1980) << 9) | (t.month << 5) | t.day
+    dos_time = (t.hour << 11) | (t.minute << 5) | (t.second // 2)
+    return dos_date, dos_time
+
+def parallel_zip_directory(directory, output_path, level=6, workers=4):
+    """
+    多线程压缩目录为 ZIP
+    成员按 PARALLEL_BLOCK_SIZE 切块，各块在线程池中独立做 deflate 压缩（非最后一块以
+    Z_SYNC_FLUSH 结束，拼接后仍是一个合法的 deflate 流），按顺序边压缩边写入，
+    内存中最多保留 workers * 2 个块；大文件的各块同样并行压缩。
+    zipfile 不支持写入预先压缩好的数据，因此这里直接写本地文件头和中央目录：
+    CRC 和压缩后大小在成员写完后回填到本地文件头，
+    大小、偏移或成员数超出 32 位字段时按实际值写入 ZIP64 扩展
+    :param directory: 要压缩的目录
+    :param output_path: 输出 ZIP 文件路径
+    :param level: 压缩级别（1-9）
+    :param workers: 线程数
+    """
+    import struct
+    import zlib
+    from concurrent.futures import ThreadPoolExecutor
+    
+    limit = 0xFFFFFFFF
+    
+    def tasks():
+        """按顺序产出各成员的块：(成员信息, 块数据, 是否最后一块, 最后一块时为 (crc, 大小))"""
+        for root, _, files in os.walk(directory):
+            for file in files:
+                file_path = os.path.join(root, file)
+                arcname = os.path.relpath(file_path, directory).replace(os.sep, '/')
+                with open(file_path, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    member = (arcname, st)
+                    # 只读取打开时的大小，压缩过程中文件变大也不会超出预留的字段
+                    remaining, crc = st.st_size, 0
+                    block = f.read(min(PARALLEL_BLOCK_SIZE, remaining))
+                    while True:
+                        crc = zlib.crc32(block, crc)
+                        remaining -= len(block)
+                        next_block = f.read(min(PARALLEL_BLOCK_SIZE, remaining)) if remaining > 0 else b''
+                        if not next_block:
+                            yield member, block, True, (crc, st.st_size - remaining)
+                            break
+                        yield member, block, False, None
+                        block = next_block
+    
+    def compress_block(task):
+        member, block, last, totals = task
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)  # 原始 deflate 流
+        data = compressor.compress(block) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+        return member, data, last, totals
+    
+    central = []
+    current = None
+    with ThreadPoolExecutor(max_workers=workers) as executor, open(output_path, 'wb') as f_out:
+        for member, data, last, totals in _ordered_parallel_map(executor, compress_block, tasks(), workers * 2):
+            if member is not current:
+                current = member
+                arcname, st = member
+                name = arcname.encode('utf-8')
+                dos_date, dos_time = _dos_datetime(st.st_mtime)
+                offset = f_out.tell()
+                # 压缩后大小的上界（deflate 的最坏膨胀加上每块的同步标记）超出 32 位时，
+                # 本地文件头预留 ZIP64 扩展（必须同时包含原始大小和压缩后大小）
+                local_zip64 = st.st_size + (st.st_size >> 8) + 1024 >= limit
+                extra = struct.pack('<HHQQ', 0x0001, 16, 0, 0) if local_zip64 else b''
+                # 本地文件头：标志位 0x0800 表示文件名为 UTF-8，压缩方法 8 为 deflate；
+                # CRC 和大小在成员写完后回填
+                f_out.write(struct.pack('<IHHHHHIIIHH', 0x04034b50, 45 if local_zip64 else 20, 0x0800, 8,
+                                        dos_time, dos_date, 0, 0, 0, len(name), len(extra)))
+                f_out.write(name)
+                f_out.write(extra)
+                data_start = f_out.tell()
+            
+            f_out.write(data)
+            if not last:
+                continue
+            
+            crc, size = totals
+            compressed_size = f_out.tell() - data_start
+            f_out.seek(offset + 14)
+            if local_zip64:
+                f_out.write(struct.pack('<III', crc, limit, limit))
+                f_out.seek(offset + 30 + len(name) + 4)
+                f_out.write(struct.pack('<QQ', size, compressed_size))
+            else:
+                f_out.write(struct.pack('<III', crc, compressed_size, size))
+            f_out.seek(0, os.SEEK_END)
+            
+            # 中央目录的 ZIP64 扩展只包含超出 32 位的字段，顺序为原始大小、压缩后大小、偏移
+            zip64_fields = [value for value in (size, compressed_size, offset) if value >= limit]
+            extra = struct.pack(f'<HH{len(zip64_fields)}Q', 0x0001, 8 * len(zip64_fields),
+                                *zip64_fields) if zip64_fields else b''
+            version = 45 if zip64_fields or local_zip64 else 20
+            central.append(struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, (3 << 8) | version, version,
+                                       0x0800, 8, dos_time, dos_date, crc, min(compressed_size, limit),
+                                       min(size, limit), len(name), len(extra), 0, 0, 0,
+                                       (st.st_mode & 0xFFFF) << 16, min(offset, limit)) + name + extra)
+        
+        central_offset = f_out.tell()
+        for record in central:
+            f_out.write(record)
+        central_size = f_out.tell() - central_offset
+        
+        if len(central) >= 0xFFFF or central_offset >= limit or central_size >= limit:
+            # ZIP64 中央目录结束记录及其定位器
+            zip64_offset = f_out.tell()
+            f_out.write(struct.pack('<IQHHIIQQQQ', 0x06064b50, 44, (3 << 8) | 45, 45, 0, 0,
+                                    len(central), len(central), central_size, central_offset))
+            f_out.write(struct.pack('<IIQI', 0x07064b50, 0, zip64_offset, 1))
+        f_out.write(struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, min(len(central), 0xFFFF),
+                                min(len(central), 0xFFFF), min(central_size, limit),
+                                min(central_offset, limit), 0))
+
+def compression_tool(file_path, compression_type='zip', level=6, workers=1,
+                     target_mb_s=None, target_ratio=None):
     """
     文件压缩工具
     :param file_path: 要压缩的文件或目录路径
-    :param compression_type: 压缩类型（zip/gzip/bzip2）
+    :param compression_type: 压缩类型（zip/auto/seekable 或 CODECS 中的编解码器，如 gzip/bzip2/xz/zstd/lz4）
     :param level: 压缩级别（1-9）
+    :param workers: 压缩线程数；大于 1 时单个文件分块并行压缩，目录 ZIP 的成员并行压缩
+    :param target_mb_s: auto 模式的目标压缩速度（MB/s）
+    :param target_ratio: auto 模式的目标压缩比
     """
     def get_original_size(path):
         """获取原始大小"""
@@ -74,20 +376,32 @@ def compression_tool(file_path, compression_type='zip', level=6):
             if os.path.isfile(file_path):
                 with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=level) as zipf:
                     zipf.write(file_path, os.path.basename(file_path))
+            elif workers > 1:
+                parallel_zip_directory(file_path, output_path, level=level, workers=workers)
             else:
                 shutil.make_archive(file_path, 'zip', file_path)
         
-        elif compression_type == 'gzip':
-            output_path = f"{file_path}.gz"
-            with open(file_path, 'rb') as f_in:
-                with gzip.open(output_path, 'wb', compresslevel=level) as f_out:
-                    shutil.copyfileobj(f_in, f_out)
+        elif compression_type == 'seekable':
+            output_path = f"{file_path}.skz"
+            write_seekable(file_path, output_path, level=level, workers=workers)
         
-        elif compression_type == 'bzip2':
-            output_path = f"{file_path}.bz2"
-            with open(file_path, 'rb') as f_in:
-                with bz2.open(output_path, 'wb', compresslevel=level) as f_out:
-                    shutil.copyfileobj(f_in, f_out)
+        else:
+            if compression_type == 'auto':
+                if not os.path.isfile(file_path):
+                    raise ValueError("auto 模式只支持单个文件")
+                compression_type, level, _ = choose_codec(file_path, target_mb_s, target_ratio)
+                print(f"自动选择：{compression_type}（级别 {level}）")
+            if compression_type not in CODECS:
+                raise ValueError(f"不支持的压缩类型：{compression_type}")
+            
+            codec = CODECS[compression_type]
+            output_path = f"{file_path}{codec['extension']}"
+            if workers > 1:
+                parallel_compress_stream(file_path, output_path, compression_type, level=level, workers=workers)
+            else:
+                with open(file_path, 'rb') as f_in:
+                    with codec['open'](output_path, 'wb', level) as f_out:
+                        shutil.copyfileobj(f_in, f_out)
         
         # 获取压缩后大小
         compressed_size = os.path.getsize(output_path)
@@ -102,6 +416,237 @@ def compression_tool(file_path, compression_type='zip', level=6):
     except Exception as e:
         print(f"压缩过程中发生错误：{str(e)}")
 
+def benchmark_compression(file_path, levels=(1, 6, 9), max_workers=None, types=('gzip', 'bzip2')):
+    """
+    并行压缩吞吐量测试：每种压缩类型、每个级别，线程数从 1 开始倍增到 max_workers
+    :param file_path: 用于测试的文件
+    :param levels: 要测试的压缩级别
+    :param max_workers: 最大线程数，默认为 CPU 核数
+    :param types: 要测试的压缩类型
+    :return: {(压缩类型, 级别, 线程数): MB/s}
+    """
+    import time
+    
+    max_workers = max_workers or os.cpu_count() or 1
+    worker_counts = []
+    count = 1
+    while count < max_workers:
+        worker_counts.append(count)
+        count *= 2
+    worker_counts.append(max_workers)
+    
+    size_mb = os.path.getsize(file_path) / (1024 * 1024)
+    output_path = f"{file_path}.bench"
+    results = {}
+    try:
+        for compression_type in types:
+            for level in levels:
+                for workers in worker_counts:
+                    start_time = time.perf_counter()
+                    parallel_compress_stream(file_path, output_path, compression_type,
+                                             level=level, workers=workers)
+                    seconds = time.perf_counter() - start_time
+                    results[(compression_type, level, workers)] = size_mb / seconds if seconds > 0 else float('inf')
+    finally:
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    
+    print(f"并行压缩吞吐量（文件大小：{size_mb:.1f} MB，单位 MB/s）：")
+    print(f"{'类型':<8}{'级别':<6}" + ''.join(f"{w:>9}线程" for w in worker_counts))
+    for compression_type in types:
+        for level in levels:
+            row = ''.join(f"{results[(compression_type, level, w)]:>11.1f}" for w in worker_counts)
+            print(f"{compression_type:<8}{level:<8}{row}")
+    return results
+
+def benchmark_codecs(sample_size=4*1024*1024):
+    """
+    各编解码器在不同类型数据上的压缩比和吞吐量
+    测试数据：文本（随机单词）、二进制（带噪声的整数数组）、已压缩数据（随机字节）
+    :param sample_size: 每种测试数据的大小（字节）
+    :return: {(数据类型, 编解码器, 级别): {'ratio', 'compress_mb_s', 'decompress_mb_s'}}
+    """
+    import random
+    import time
+    from array import array
+    
+    rng = random.Random(42)
+    words = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(2, 10)))
+             for _ in range(5000)]
+    text = ' '.join(rng.choice(words) for _ in range(sample_size // 6)).encode()[:sample_size]
+    binary = array('i', (i // 7 + rng.randint(0, 15) for i in range(sample_size // 4))).tobytes()
+    compressed = os.urandom(sample_size)
+    inputs = {'文本': text, '二进制': binary, '已压缩': compressed}
+    
+    results = {}
+    size_mb = sample_size / (1024 * 1024)
+    for input_name, data in inputs.items():
+        for name, codec in CODECS.items():
+            for level in codec['levels']:
+                start_time = time.perf_counter()
+                packed = codec['compress'](data, level)
+                compress_seconds = max(time.perf_counter() - start_time, 1e-9)
+                start_time = time.perf_counter()
+                codec['decompress'](packed)
+                decompress_seconds = max(time.perf_counter() - start_time, 1e-9)
+                results[(input_name, name, level)] = {
+                    'ratio': len(data) / max(len(packed), 1),
+                    'compress_mb_s': size_mb / compress_seconds,
+                    'decompress_mb_s': size_mb / decompress_seconds
+                }
+    
+    print(f"编解码器对比（每种数据 {size_mb:.1f} MB）：")
+    print(f"{'数据':<6}{'编解码器':<8}{'级别':>4}{'压缩比':>10}{'压缩 MB/s':>12}{'解压 MB/s':>12}")
+    for (input_name, name, level), r in results.items():
+        print(f"{input_name:<6}{name:<10}{level:>6}{r['ratio']:>10.2f}"
+              f"{r['compress_mb_s']:>12.1f}{r['decompress_mb_s']:>12.1f}")
+    return results
+
+def chunk_store(store_dir, min_size=64*1024, avg_size=256*1024, max_size=1024*1024):
+    """
+    内容寻址的分块存储
+    文件按内容定义分块（Gear 滚动哈希）：切点由内容决定，文件中间插入或修改数据
+    只影响附近的块，其余块的哈希不变，因此每个不同的块只存储一次
+    :param store_dir: 存储目录
+    :param min_size: 最小块大小（字节）
+    :param avg_size: 平均块大小（字节，须为 2 的幂）
+    :param max_size: 最大块大小（字节）
+    """
+    import hashlib
+    import random
+    import zlib
+    
+    # Gear 表：每个字节值对应一个固定的 64 位随机数（固定种子，保证切点可复现）
+    rng = random.Random(0x5EED)
+    gear = [rng.getrandbits(64) for _ in range(256)]
+    
+    # 哈希每步左移一位，低 bits 位只取决于最近 bits 个字节：
+    #   h_i & mask == sum(gear[data[i - j]] << j for j < bits) & mask
+    # 于是把一段数据的每个位置放进一个大整数的一个"通道"（width 字节），
+    # 用 bytes.translate 查表、移位相加求窗口和，整段一起计算，不再逐字节循环
+    mask = avg_size - 1
+    bits = mask.bit_length()
+    width = bits // 8 + 1                    # 通道容得下两个 bits 位数之和，不会进位到相邻通道
+    block = max(256, min(64 * 1024, avg_size // 4))
+    byte_tables = [bytes((gear[v] & mask) >> (8 * t) & 0xFF for v in range(256)) for t in range(width)]
+    
+    def lanes(value):
+        return int.from_bytes(value.to_bytes(width, 'little') * block, 'little')
+    
+    lane_mask = lanes(mask)
+    # 第 k 步把窗口从 2^k 扩到 2^(k+1)：加上左移 s 个通道、通道内再左移 s 位的自身，
+    # 移位前先去掉会溢出 bits 位的高位
+    steps = []
+    span = 1
+    while span < bits:
+        steps.append((span * width * 8 + span, lanes(mask >> span)))
+        span *= 2
+    lane_zero = bytes(width)
+    
+    def window_hashes(segment):
+        """segment 每个位置的哈希低 bits 位（segment 开头哈希为 0），每个位置 width 字节"""
+        lanes_buffer = bytearray(block * width)
+        for t, table in enumerate(byte_tables):
+            lanes_buffer[t:len(segment) * width:width] = segment.translate(table)
+        acc = int.from_bytes(lanes_buffer, 'little')
+        for shift, keep in steps:
+            acc = (acc + ((acc & keep) << shift)) & lane_mask
+        return acc.to_bytes(block * width + width, 'little')
+    
+    class ChunkStore:
+        def __init__(self, store_dir):
+            self.store_dir = store_dir
+            self.objects_dir = os.path.join(store_dir, 'objects')
+            os.makedirs(self.objects_dir, exist_ok=True)
+        
+        def _find_cut(self, data, start, end):
+            """在 data[start:end] 中查找切点，返回块的结束位置"""
+            if end - start <= min_size:
+                return end
+            limit = min(end, start + max_size)
+            # 跳过最小块长度，哈希从这里开始；之后每段多带前 bits-1 个字节，窗口才完整
+            pos = start + min_size
+            back = 0
+            while pos < limit:
+                stop = min(limit, pos + block - back)
+                hashes = window_hashes(bytes(data[pos - back:stop]))
+                hashes_end = (stop - pos + back) * width
+                i = hashes.find(lane_zero, back * width, hashes_end)
+                while i >= 0 and i % width:
+                    i = hashes.find(lane_zero, i + width - i % width, hashes_end)
+                if i >= 0:
+                    return pos - back + i // width + 1
+                pos, back = stop, bits - 1
+            return limit
+        
+        def iter_chunks(self, file_path, block_size=4*1024*1024):
+            """按内容定义分块读取文件，逐个产出块数据"""
+            buffer = bytearray()
+            with open(file_path, 'rb') as f:
+                eof = False
+                while not eof or buffer:
+                    # 缓冲区至少保留一个最大块，保证切点与读取边界无关
+                    if not eof and len(buffer) < max_size:
+                        block = f.read(block_size)
+                        if block:
+                            buffer += block
+                            continue
+                        eof = True
+                    end = self._find_cut(buffer, 0, len(buffer))
+                    yield bytes(buffer[:end])
+                    del buffer[:end]
+        
+        def _object_path(self, digest):
+            return os.path.join(self.objects_dir, digest[:2], digest[2:])
+        
+        def has(self, digest):
+            """块是否已存在"""
+            return os.path.exists(self._object_path(digest))
+        
+        def put(self, data):
+            """
+            存储一个块（已存在则跳过）
+            :return: (块哈希, 新写入的字节数)
+            """
+            digest = hashlib.sha256(data).hexdigest()
+            path = self._object_path(digest)
+            if os.path.exists(path):
+                return digest, 0
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            compressed = zlib.compress(data, 6)
+            temp_path = f"{path}.tmp{os.getpid()}"
+            with open(temp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(temp_path, path)
+            return digest, len(compressed)
+        
+        def get(self, digest, verify=False):
+            """读取一个块"""
+            with open(self._object_path(digest), 'rb') as f:
+                data = zlib.decompress(f.read())
+            if verify and hashlib.sha256(data).hexdigest() != digest:
+                raise ValueError(f"块 {digest} 校验失败")
+            return data
+        
+        def all_digests(self):
+            """列出所有已存储的块"""
+            digests = set()
+            for prefix in os.listdir(self.objects_dir):
+                prefix_dir = os.path.join(self.objects_dir, prefix)
+                for name in os.listdir(prefix_dir):
+                    if '.tmp' not in name:
+                        digests.add(prefix + name)
+            return digests
+        
+        def remove(self, digest):
+            """删除一个块，返回释放的字节数"""
+            path = self._object_path(digest)
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+    
+    return ChunkStore(store_dir)
+
 def incremental_backup(source_path, backup_dir):
     """
     增量备份工具
@@ -129,10 +674,28 @@ def incremental_backup(source_path, backup_dir):
             with open(self.history_file, 'w') as f:
                 json.dump(self.history, f, indent=4)
         
+        def _new_backup_name(self, kind):
+            """
+            生成备份名称，时间戳精确到微秒，同一时刻的名称已被占用时重新取时间
+            :return: (备份名称, 时间戳)
+            """
+            while True:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
+                backup_name = f"{kind}_backup_{timestamp}"
+                if backup_name not in self.history:
+                    return backup_name, timestamp
+        
+        @staticmethod
+        def _parse_timestamp(timestamp):
+            """解析备份时间戳（也接受早期不带微秒的格式）"""
+            try:
+                return datetime.strptime(timestamp, '%Y%m%d_%H%M%S_%f')
+            except ValueError:
+                return datetime.strptime(timestamp, '%Y%m%d_%H%M%S')
+        
         def create_full_backup(self):
             """创建完整备份"""
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_name = f"full_backup_{timestamp}"
+            backup_name, timestamp = self._new_backup_name('full')
             backup_path = os.path.join(self.backup_dir, backup_name)
             
             if os.path.isfile(self.source_path):
@@ -152,12 +715,14 @@ def incremental_backup(source_path, backup_dir):
         
         def create_incremental_backup(self):
             """创建增量备份"""
-            if not self.history:
+            # 增量链只由完整备份和增量备份组成，去重备份不能作为基准
+            chain = [item for item in self.history.items() if item[1]['type'] in ('full', 'incremental')]
+            if not chain:
                 return self.create_full_backup()
             
             # 获取上次备份时间
-            last_backup = max(self.history.items(), key=lambda x: x[1]['timestamp'])
-            last_backup_time = datetime.strptime(last_backup[1]['timestamp'], '%Y%m%d_%H%M%S')
+            last_backup = max(chain, key=lambda x: x[1]['timestamp'])
+            last_backup_time = self._parse_timestamp(last_backup[1]['timestamp'])
             
             # 查找修改过的文件
             modified_files = []
@@ -172,8 +737,7 @@ def incremental_backup(source_path, backup_dir):
                 return None
             
             # 创建增量备份
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            backup_name = f"incremental_backup_{timestamp}"
+            backup_name, timestamp = self._new_backup_name('incremental')
             backup_path = os.path.join(self.backup_dir, backup_name)
             
             with zipfile.ZipFile(f"{backup_path}.zip", 'w') as zipf:
@@ -190,15 +754,220 @@ def incremental_backup(source_path, backup_dir):
             self._save_history()
             
             return f"{backup_path}.zip"
+        
+        def _chunk_store(self):
+            """获取分块存储（位于备份目录下的 chunks 子目录）"""
+            return chunk_store(os.path.join(self.backup_dir, 'chunks'))
+        
+        def _manifest_path(self, backup_name):
+            return os.path.join(self.backup_dir, 'manifests', f"{backup_name}.json")
+        
+        def _load_manifest(self, backup_name):
+            import json
+            with open(self._manifest_path(backup_name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        
+        def _chunked_backups(self):
+            """所有去重备份的名称（按时间排序）"""
+            names = [name for name, info in self.history.items() if info['type'] == 'chunked']
+            return sorted(names, key=lambda name: self.history[name]['timestamp'])
+        
+        def create_chunked_backup(self):
+            """
+            创建去重备份
+            文件被切分成内容定义的块，只写入存储中尚不存在的块；
+            大小和修改时间与上一次去重备份相同的文件直接复用其块列表，不再读取
+            """
+            import json
+            
+            store = self._chunk_store()
+            
+            # 上一次去重备份的文件记录
+            previous = {}
+            chunked = self._chunked_backups()
+            if chunked:
+                for entry in self._load_manifest(chunked[-1])['files']:
+                    previous[entry['path']] = entry
+            
+            if os.path.isfile(self.source_path):
+                base_dir = os.path.dirname(self.source_path)
+                file_paths = [self.source_path]
+            else:
+                base_dir = self.source_path
+                file_paths = [os.path.join(root, file)
+                              for root, _, files in os.walk(self.source_path) for file in files]
+            
+            files = []
+            stats = {'files': 0, 'reused_files': 0, 'chunks': 0, 'new_chunks': 0, 'stored_bytes': 0}
+            for file_path in file_paths:
+                rel_path = os.path.relpath(file_path, base_dir)
+                st = os.stat(file_path)
+                entry = {'path': rel_path, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+                
+                old = previous.get(rel_path)
+                if old and old['size'] == st.st_size and old['mtime_ns'] == st.st_mtime_ns \
+                        and all(store.has(digest) for digest in old['chunks']):
+                    entry['chunks'] = old['chunks']
+                    stats['reused_files'] += 1
+                else:
+                    entry['chunks'] = []
+                    for data in store.iter_chunks(file_path):
+                        digest, written = store.put(data)
+                        entry['chunks'].append(digest)
+                        if written:
+                            stats['new_chunks'] += 1
+                            stats['stored_bytes'] += written
+                stats['files'] += 1
+                stats['chunks'] += len(entry['chunks'])
+                files.append(entry)
+            
+            backup_name, timestamp = self._new_backup_name('chunked')
+            manifest_path = self._manifest_path(backup_name)
+            os.makedirs(os.path.dirname(manifest_path), exist_ok=True)
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                json.dump({'name': backup_name, 'source': self.source_path,
+                           'timestamp': timestamp, 'files': files}, f)
+            
+            # 记录备份信息
+            self.history[backup_name] = {
+                'type': 'chunked',
+                'timestamp': timestamp,
+                'path': manifest_path,
+                'stats': stats
+            }
+            self._save_history()
+            
+            print(f"去重备份完成：{backup_name}")
+            print(f"文件数：{stats['files']}（未变化 {stats['reused_files']}）")
+            print(f"块数：{stats['chunks']}（新增 {stats['new_chunks']}，写入 {stats['stored_bytes']} 字节）")
+            return backup_name
+        
+        def restore_backup(self, backup_name, target_dir):
+            """
+            从去重备份恢复文件
+            :param backup_name: 备份名称
+            :param target_dir: 恢复到的目录
+            """
+            store = self._chunk_store()
+            manifest = self._load_manifest(backup_name)
+            for entry in manifest['files']:
+                target_path = os.path.join(target_dir, entry['path'])
+                os.makedirs(os.path.dirname(target_path) or '.', exist_ok=True)
+                with open(target_path, 'wb') as f:
+                    for digest in entry['chunks']:
+                        f.write(store.get(digest))
+                os.utime(target_path, ns=(entry['mtime_ns'], entry['mtime_ns']))
+            return len(manifest['files'])
+        
+        def verify_backup(self, backup_name=None):
+            """
+            校验去重备份引用的所有块（缺失或哈希不符）
+            :param backup_name: 备份名称，None 表示校验所有去重备份
+            :return: 有问题的块 {块哈希: 错误信息}
+            """
+            store = self._chunk_store()
+            names = [backup_name] if backup_name else self._chunked_backups()
+            checked, problems = set(), {}
+            for name in names:
+                for entry in self._load_manifest(name)['files']:
+                    for digest in entry['chunks']:
+                        if digest in checked:
+                            continue
+                        checked.add(digest)
+                        try:
+                            store.get(digest, verify=True)
+                        except Exception as e:
+                            problems[digest] = str(e)
+            print(f"校验完成：{len(checked)} 个块，{len(problems)} 个有问题")
+            return problems
+        
+        def delete_backup(self, backup_name):
+            """删除一个去重备份的清单（块由 collect_garbage 回收）"""
+            if self.history.get(backup_name, {}).get('type') != 'chunked':
+                raise ValueError(f"去重备份 {backup_name} 不存在")
+            os.remove(self._manifest_path(backup_name))
+            del self.history[backup_name]
+            self._save_history()
+        
+        def collect_garbage(self):
+            """
+            回收不再被任何清单引用的块
+            :return: (删除的块数, 释放的字节数)
+            """
+            store = self._chunk_store()
+            referenced = set()
+            for name in self._chunked_backups():
+                for entry in self._load_manifest(name)['files']:
+                    referenced.update(entry['chunks'])
+            
+            removed = freed = 0
+            for digest in store.all_digests() - referenced:
+                freed += store.remove(digest)
+                removed += 1
+            print(f"垃圾回收完成：删除 {removed} 个块，释放 {freed} 字节")
+            return removed, freed
     
     return BackupManager(source_path, backup_dir)
 
-def file_splitter(file_path, chunk_size=1024*1024):
+SPLIT_BUFFER_SIZE = 1024 * 1024  # 分割/合并时每个线程复用的缓冲区大小
+
+def _transfer_range(src_fd, dst_fd, src_offset, dst_offset, length, hasher=None, buffer=None):
+    """
+    在两个文件描述符之间按位置复制一段数据（不移动文件指针，可以多线程同时使用）
+    不需要计算哈希时优先用 os.copy_file_range 在内核内复制；
+    否则用 os.preadv 读入复用的缓冲区，更新哈希后用 os.pwrite 写出
+    :param hasher: hashlib 对象，None 表示不计算哈希
+    :param buffer: 复用的缓冲区（bytearray）
+    :return: 实际复制的字节数
+    """
+    done = 0
+    if hasher is None and hasattr(os, 'copy_file_range'):
+        try:
+            while done < length:
+                copied = os.copy_file_range(src_fd, dst_fd, length - done,
+                                            src_offset + done, dst_offset + done)
+                if copied == 0:
+                    break
+                done += copied
+            return done
+        except OSError:
+            pass  # 不支持时退回缓冲复制
+    
+    buffer = buffer if buffer is not None else bytearray(SPLIT_BUFFER_SIZE)
+    view = memoryview(buffer)
+    while done < length:
+        want = min(len(buffer), length - done)
+        if hasattr(os, 'preadv'):
+            count = os.preadv(src_fd, [view[:want]], src_offset + done)
+            data = view[:count]
+        else:
+            data = os.pread(src_fd, want, src_offset + done)
+            count = len(data)
+        if not count:
+            break
+        if hasher is not None:
+            hasher.update(data)
+        written = 0
+        while written < count:
+            written += os.pwrite(dst_fd, data[written:], dst_offset + done + written)
+        done += count
+    return done
+
+def file_splitter(file_path, chunk_size=1024*1024, workers=4, checksum=True):
     """
     文件分割器
+    各分块由线程池并行写出（按位置读取，不使用大的中间缓冲区），
+    并生成 JSON 清单 {file_path}.manifest.json，记录每个分块的偏移、大小和 SHA-256
     :param file_path: 要分割的文件路径
     :param chunk_size: 每个分块的大小（字节）
+    :param workers: 并行写出的线程数
+    :param checksum: 是否计算分块哈希；为 False 时直接在内核内复制
+    :return: 清单文件路径
     """
+    import hashlib
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+    
     try:
         # 获取文件大小
         file_size = os.path.getsize(file_path)
@@ -206,30 +975,408 @@ def file_splitter(file_path, chunk_size=1024*1024):
         # 计算分块数量
         num_chunks = (file_size + chunk_size - 1) // chunk_size
         
-        # 创建分割信息文件
-        info_file = f"{file_path}.split_info"
-        with open(info_file, 'w') as f:
-            f.write(f"原始文件：{file_path}\n")
-            f.write(f"文件大小：{file_size} 字节\n")
-            f.write(f"分块大小：{chunk_size} 字节\n")
-            f.write(f"分块数量：{num_chunks}\n")
+        src_fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        
+        def write_part(i):
+            """写出第 i 个分块"""
+            offset = i * chunk_size
+            length = min(chunk_size, file_size - offset)
+            part_path = f"{file_path}.part{i+1}"
+            hasher = hashlib.sha256() if checksum else None
+            dst_fd = os.open(part_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+            try:
+                copied = _transfer_range(src_fd, dst_fd, offset, 0, length, hasher)
+            finally:
+                os.close(dst_fd)
+            if copied != length:
+                raise IOError(f"分块 {part_path} 不完整")
+            part = {'name': os.path.basename(part_path), 'offset': offset, 'size': length}
+            if hasher is not None:
+                part['sha256'] = hasher.hexdigest()
+            return part
         
         # 分割文件
-        with open(file_path, 'rb') as f:
-            for i in range(num_chunks):
-                chunk_file = f"{file_path}.part{i+1}"
-                with open(chunk_file, 'wb') as chunk:
-                    chunk.write(f.read(chunk_size))
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                parts = list(executor.map(write_part, range(num_chunks)))
+        finally:
+            os.close(src_fd)
+        
+        # 创建分割清单
+        manifest = {
+            'file': os.path.basename(file_path),
+            'size': file_size,
+            'chunk_size': chunk_size,
+            'created': datetime.now().isoformat(),
+            'parts': parts
+        }
+        manifest_file = f"{file_path}.manifest.json"
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=4)
         
         print(f"文件分割完成：")
         print(f"原始文件：{file_path}")
         print(f"分块数量：{num_chunks}")
         print(f"分块大小：{chunk_size} 字节")
-        print(f"信息文件：{info_file}")
+        print(f"清单文件：{manifest_file}")
+        return manifest_file
     
     except Exception as e:
         print(f"分割过程中发生错误：{str(e)}")
 
+def file_joiner(manifest_file, output_path=None, workers=4, verify=True, overwrite=False):
+    """
+    文件合并器：按清单校验并并行合并分块
+    各分块按清单中的偏移写入同目录下临时文件的对应位置，全部校验通过后才替换为输出文件；
+    失败时删除临时文件，已有的输出文件不受影响
+    :param manifest_file: file_splitter 生成的清单文件
+    :param output_path: 输出文件路径，默认为清单所在目录下的原文件名
+    :param workers: 并行合并的线程数
+    :param verify: 是否校验分块的 SHA-256
+    :param overwrite: 输出文件已存在时是否覆盖（默认的输出路径通常就是原文件）
+    :return: 输出文件路径；失败时返回 None
+    """
+    import hashlib
+    import json
+    from concurrent.futures import ThreadPoolExecutor
+    
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        base_dir = os.path.dirname(manifest_file)
+        output_path = output_path or os.path.join(base_dir, manifest['file'])
+        if os.path.exists(output_path) and not overwrite:
+            raise FileExistsError(f"输出文件已存在：{output_path}（指定 overwrite=True 覆盖）")
+        
+        # 先检查分块是否齐全、大小是否正确
+        for part in manifest['parts']:
+            part_path = os.path.join(base_dir, part['name'])
+            if not os.path.exists(part_path):
+                raise FileNotFoundError(f"缺少分块：{part['name']}")
+            if os.path.getsize(part_path) != part['size']:
+                raise ValueError(f"分块大小不符：{part['name']}")
+        
+        temp_path = f"{output_path}.{os.getpid()}.tmp"
+        dst_fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0), 0o644)
+        
+        def join_part(part):
+            """把一个分块写入输出文件，返回校验是否通过"""
+            src_fd = os.open(os.path.join(base_dir, part['name']), os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+            try:
+                hasher = hashlib.sha256() if verify and 'sha256' in part else None
+                _transfer_range(src_fd, dst_fd, 0, part['offset'], part['size'], hasher)
+            finally:
+                os.close(src_fd)
+            return hasher is None or hasher.hexdigest() == part['sha256']
+        
+        try:
+            try:
+                os.ftruncate(dst_fd, manifest['size'])
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(join_part, manifest['parts']))
+            finally:
+                os.close(dst_fd)
+            
+            bad_parts = [part['name'] for part, ok in zip(manifest['parts'], results) if not ok]
+            if bad_parts:
+                raise ValueError(f"分块校验失败：{', '.join(bad_parts)}")
+            os.replace(temp_path, output_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        print(f"文件合并完成：")
+        print(f"清单文件：{manifest_file}")
+        print(f"分块数量：{len(manifest['parts'])}")
+        print(f"输出文件：{output_path}")
+        return output_path
+    
+    except Exception as e:
+        print(f"合并过程中发生错误：{str(e)}")
+        return None
+
+# 可随机访问的分帧压缩格式（.skz）
+# 布局：[帧 0][帧 1]...[索引][尾部]
+#   帧：用注册表中的编解码器独立压缩的数据块，可以单独解压
+#   索引：16 字节编解码器名称 + 每帧一条 (压缩偏移, 原始偏移, 之前的行数)，
+#         最后再加一条表示文件结尾的记录，每个字段为 8 字节无符号整数
+#   尾部：(索引偏移, 帧数, 魔数 b'SEEKIDX1')
+SEEKABLE_MAGIC = b'SEEKIDX1'
+SEEKABLE_FRAME_SIZE = 1024 * 1024
+
+def write_seekable(file_path, output_path, codec_name='gzip', level=6,
+                   frame_size=SEEKABLE_FRAME_SIZE, workers=1):
+    """
+    写入可随机访问的分帧压缩文件
+    :param file_path: 源文件路径
+    :param output_path: 输出文件路径（通常以 .skz 结尾）
+    :param codec_name: 帧使用的编解码器（见 CODECS）
+    :param level: 压缩级别
+    :param frame_size: 每帧的原始数据大小（字节），越小随机读取越快、压缩比越低
+    :param workers: 压缩线程数
+    """
+    import struct
+    from concurrent.futures import ThreadPoolExecutor
+    
+    codec = CODECS[codec_name]
+    
+    def compress_frame(block):
+        return codec['compress'](block, level), len(block), block.count(b'\n')
+    
+    entries = []
+    raw_offset = lines = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor, open(output_path, 'wb') as f_out:
+        blocks = _read_blocks(file_path, frame_size)
+        for compressed, raw_size, newlines in _ordered_parallel_map(executor, compress_frame, blocks, workers * 2):
+            entries.append((f_out.tell(), raw_offset, lines))
+            f_out.write(compressed)
+            raw_offset += raw_size
+            lines += newlines
+        
+        index_offset = f_out.tell()
+        entries.append((index_offset, raw_offset, lines))
+        f_out.write(codec_name.encode('ascii').ljust(16, b'\0'))
+        for entry in entries:
+            f_out.write(struct.pack('<QQQ', *entry))
+        f_out.write(struct.pack('<QQ8s', index_offset, len(entries) - 1, SEEKABLE_MAGIC))
+
+def build_gzip_index(gz_path, spacing=SEEKABLE_FRAME_SIZE):
+    """
+    为 gzip 文件建立旁路检查点索引（{gz_path}.idx）
+    检查点设在 gzip 成员的边界上：每个成员可以独立解压，
+    所以多成员文件（例如 workers > 1 时 compression_tool 的输出）读取时只需解压涉及的成员。
+    单成员的普通 gzip 文件只有一个检查点，无法获得随机访问
+    （Python 的 zlib 不能在任意比特位置恢复 deflate 状态）
+    :param gz_path: gzip 文件路径
+    :param spacing: 相邻检查点之间至少间隔的原始数据量（字节）
+    :return: 索引文件路径
+    """
+    import json
+    import zlib
+    
+    checkpoints = [[0, 0, 0]]
+    raw_offset = lines = 0
+    consumed = 0  # 已完整解压的压缩数据字节数
+    decompressor = zlib.decompressobj(31)
+    with open(gz_path, 'rb') as f:
+        data = f.read(SEEKABLE_FRAME_SIZE)
+        while data:
+            raw = decompressor.decompress(data)
+            raw_offset += len(raw)
+            lines += raw.count(b'\n')
+            if decompressor.eof:
+                # 一个成员结束，剩余数据属于下一个成员
+                rest = decompressor.unused_data
+                consumed += len(data) - len(rest)
+                if raw_offset - checkpoints[-1][1] >= spacing:
+                    checkpoints.append([consumed, raw_offset, lines])
+                decompressor = zlib.decompressobj(31)
+                data = rest or f.read(SEEKABLE_FRAME_SIZE)
+            else:
+                consumed += len(data)
+                data = f.read(SEEKABLE_FRAME_SIZE)
+    
+    if checkpoints[-1][1] == raw_offset and len(checkpoints) > 1:
+        checkpoints.pop()
+    index = {
+        'size': os.path.getsize(gz_path),
+        'mtime_ns': os.stat(gz_path).st_mtime_ns,
+        'checkpoints': checkpoints,
+        'end': [os.path.getsize(gz_path), raw_offset, lines]
+    }
+    index_path = f"{gz_path}.idx"
+    with open(index_path, 'w') as f:
+        json.dump(index, f)
+    return index_path
+
+def seekable_reader(file_path):
+    """
+    随机访问读取器：支持 .skz 文件，以及带有有效 .idx 旁路索引的 gzip 文件
+    读取时只解压涉及的帧（最近使用的帧会被缓存）
+    :param file_path: 文件路径
+    """
+    import json
+    import struct
+    from bisect import bisect_left, bisect_right
+    
+    class SeekableReader:
+        def __init__(self, file_path):
+            self.file_path = file_path
+            self.file = open(file_path, 'rb')
+            self.cache = {}
+            if file_path.endswith('.gz'):
+                self._load_gzip_index()
+            else:
+                self._load_seekable_index()
+            self.compressed_offsets = [entry[0] for entry in self.entries]
+            self.raw_offsets = [entry[1] for entry in self.entries]
+            self.line_offsets = [entry[2] for entry in self.entries]
+        
+        def _load_seekable_index(self):
+            """读取 .skz 的尾部和索引"""
+            self.file.seek(-24, os.SEEK_END)
+            index_offset, frame_count, magic = struct.unpack('<QQ8s', self.file.read(24))
+            if magic != SEEKABLE_MAGIC:
+                raise ValueError("不是可随机访问的压缩文件")
+            self.file.seek(index_offset)
+            codec_name = self.file.read(16).rstrip(b'\0').decode('ascii')
+            self.decompress = CODECS[codec_name]['decompress']
+            raw = self.file.read((frame_count + 1) * 24)
+            self.entries = [struct.unpack_from('<QQQ', raw, i * 24) for i in range(frame_count + 1)]
+        
+        def _load_gzip_index(self):
+            """读取 gzip 的旁路索引，索引过期时报错"""
+            index_path = f"{self.file_path}.idx"
+            with open(index_path, 'r') as f:
+                index = json.load(f)
+            st = os.stat(self.file_path)
+            if index['size'] != st.st_size or index['mtime_ns'] != st.st_mtime_ns:
+                raise ValueError(f"索引 {index_path} 已过期")
+            self.decompress = gzip.decompress
+            self.entries = [tuple(entry) for entry in index['checkpoints']] + [tuple(index['end'])]
+        
+        @property
+        def size(self):
+            """原始数据大小"""
+            return self.raw_offsets[-1]
+        
+        @property
+        def line_count(self):
+            """换行符个数"""
+            return self.line_offsets[-1]
+        
+        def _frame(self, i):
+            """解压第 i 帧（缓存最近的几帧）"""
+            if i not in self.cache:
+                if len(self.cache) >= 4:
+                    self.cache.pop(next(iter(self.cache)))
+                start, end = self.compressed_offsets[i], self.compressed_offsets[i + 1]
+                self.file.seek(start)
+                self.cache[i] = self.decompress(self.file.read(end - start))
+            return self.cache[i]
+        
+        def read(self, offset=0, length=None):
+            """读取原始数据中 [offset, offset + length) 的字节"""
+            end = self.size if length is None else min(offset + length, self.size)
+            if offset >= end:
+                return b''
+            parts = []
+            i = bisect_right(self.raw_offsets, offset) - 1
+            while offset < end:
+                frame = self._frame(i)
+                start = offset - self.raw_offsets[i]
+                piece = frame[start:start + (end - offset)]
+                parts.append(piece)
+                offset += len(piece)
+                i += 1
+            return b''.join(parts)
+        
+        def iter_frames(self):
+            """按顺序逐帧产出解压后的数据"""
+            for i in range(len(self.entries) - 1):
+                yield self._frame(i)
+        
+        def read_lines(self, start_line, count):
+            """
+            读取从第 start_line 行（从 0 开始）起的 count 行
+            借助每帧之前的行数定位起始帧，只解压涉及的帧
+            """
+            result = []
+            # 第 start_line 行紧跟在第 start_line 个换行符之后，该换行符位于
+            # 最后一个"之前的行数 < start_line"的帧中
+            i = max(bisect_left(self.line_offsets, start_line) - 1, 0)
+            line_no = self.line_offsets[i]
+            pending = b''
+            while i < len(self.entries) - 1 and len(result) < count:
+                pieces = (pending + self._frame(i)).split(b'\n')
+                pending = pieces.pop()
+                for piece in pieces:
+                    if line_no >= start_line:
+                        result.append(piece)
+                        if len(result) >= count:
+                            break
+                    line_no += 1
+                i += 1
+            if pending and len(result) < count and line_no >= start_line:
+                result.append(pending)
+            return [line.decode('utf-8', errors='replace') for line in result]
+        
+        def close(self):
+            self.file.close()
+    
+    return SeekableReader(file_path)
+
+SEARCH_CHUNK_SIZE = 1024 * 1024  # 流式搜索时每次解压读取的大小
+SEARCH_REGEX_OVERLAP = 4096      # 正则搜索时相邻块之间保留的重叠字节数
+
+def _search_chunks(chunks, keyword, regex=False, names_only=False, overlap=None):
+    """
+    在依次产出的数据块中搜索（内存占用与数据总大小无关），结果与对整个数据调用 finditer 相同
+    每个缓冲区末尾的 overlap 字节作为前瞻窗口：结束位置落在窗口内的匹配（以及 $、\b、先行断言
+    在缓冲区末尾的判断）要等读入下一块后再确定，最后一块除外；下一轮从上一个匹配的结束位置继续搜索，
+    并在前面保留 overlap 字节作为后顾断言的上下文。
+    普通关键字的重叠为关键字长度减 1，正则默认为 SEARCH_REGEX_OVERLAP；
+    比重叠窗口更长的正则匹配按当前缓冲区中的结果报告（可能被截断）
+    :param chunks: 数据块的可迭代对象
+    :param keyword: 关键字或正则表达式
+    :param regex: keyword 是否为正则表达式
+    :param names_only: 为 True 时找到第一个匹配就停止读取
+    :return: [(字节偏移, 行号)]，行号从 1 开始
+    """
+    import re
+    
+    pattern = re.compile(keyword.encode('utf-8') if regex else re.escape(keyword.encode('utf-8')))
+    if overlap is None:
+        overlap = SEARCH_REGEX_OVERLAP if regex else max(len(keyword.encode('utf-8')) - 1, 0)
+    
+    hits = []
+    tail = b''
+    pos = 0         # 缓冲区开头作为上下文保留的字节数，从这里开始搜索
+    base = 0        # tail 在流中的起始偏移
+    base_line = 1   # tail 起始处的行号
+    resume = 0      # 上一个匹配的结束偏移，与整体搜索一样从这里继续，不报告相互重叠的匹配
+    chunks = iter(chunks)
+    chunk = next(chunks, b'')
+    while chunk is not None:
+        following = next(chunks, None)
+        buffer = tail + chunk
+        limit = len(buffer) if following is None else len(buffer) - overlap
+        start = max(pos, resume - base)
+        stop = len(buffer)
+        line, last = base_line, 0
+        # 从 start 开始搜索：^ 和 \A 只在真正的数据开头匹配，不会把缓冲区开头当作文本开头
+        for match in pattern.finditer(buffer, start):
+            if match.end() > limit and match.start() >= limit - 1:
+                # 匹配伸入前瞻窗口，读入下一块后重新判断
+                stop = match.start()
+                break
+            if match.start() == match.end() and hits and hits[-1][0] == base + match.start():
+                continue  # 与上一轮已报告的空匹配位置相同
+            resume = base + match.end()
+            line += buffer.count(b'\n', last, match.start())
+            last = match.start()
+            hits.append((base + match.start(), line))
+            if names_only:
+                return hits
+        
+        # 下一轮从 frontier 开始搜索，前面保留 overlap 字节作为上下文（\b、后顾断言和 ^ 的判断需要）
+        frontier = max(min(stop, limit), start, resume - base)
+        cut = max(frontier - max(overlap, 1), 0)
+        pos = frontier - cut
+        base_line += buffer.count(b'\n', 0, cut)
+        base += cut
+        tail = buffer[cut:]
+        chunk = following
+    return hits
+
+def _search_member(archive_path, member, keyword, regex, names_only, chunk_size, overlap):
+    """在 ZIP 的单个成员中搜索（工作进程各自打开 ZIP 文件）"""
+    with zipfile.ZipFile(archive_path, 'r') as zipf:
+        with zipf.open(member) as f:
+            chunks = iter(lambda: f.read(chunk_size), b'')
+            return member, _search_chunks(chunks, keyword, regex, names_only, overlap)
+
 def compression_browser(archive_path):
     """
     压缩文件浏览器
@@ -239,18 +1386,26 @@ def compression_browser(archive_path):
         def __init__(self, archive_path):
             self.archive_path = archive_path
             self.archive = None
+            self.index = None
             self._open_archive()
         
         def _open_archive(self):
             """打开压缩文件"""
             if self.archive_path.endswith('.zip'):
                 self.archive = zipfile.ZipFile(self.archive_path, 'r')
-            elif self.archive_path.endswith('.gz'):
-                self.archive = gzip.open(self.archive_path, 'rb')
-            elif self.archive_path.endswith('.bz2'):
-                self.archive = bz2.open(self.archive_path, 'rb')
-            else:
+                return
+            if self.archive_path.endswith('.skz'):
+                self.archive = self.index = seekable_reader(self.archive_path)
+                return
+            codec_name = codec_for_path(self.archive_path)
+            if codec_name is None:
                 raise ValueError("不支持的压缩格式")
+            self.archive = CODECS[codec_name]['open'](self.archive_path, 'rb', None)
+            if codec_name == 'gzip' and os.path.exists(f"{self.archive_path}.idx"):
+                try:
+                    self.index = seekable_reader(self.archive_path)
+                except ValueError:
+                    self.index = None  # 索引过期，退回顺序解压
         
         def list_contents(self):
             """列出压缩文件内容"""
@@ -258,38 +1413,111 @@ def compression_browser(archive_path):
                 return self.archive.namelist()
             return [os.path.basename(self.archive_path)]
         
-        def preview_text(self, file_name):
-            """预览文本文件内容"""
+        def _decode(self, content, partial):
+            """解码预览内容；部分读取时边界上被截断的字符会被替换"""
+            try:
+                return content.decode('utf-8', errors='replace' if partial else 'strict')
+            except UnicodeDecodeError:
+                return "无法解码文件内容"
+        
+        def preview_text(self, file_name=None, offset=0, length=None):
+            """
+            预览文本文件内容
+            :param file_name: ZIP 中的成员名称（单文件压缩格式忽略）
+            :param offset: 起始偏移（原始数据中的字节位置）
+            :param length: 读取的字节数，None 表示读到结尾
+            """
+            partial = offset > 0 or length is not None
             if isinstance(self.archive, zipfile.ZipFile):
                 with self.archive.open(file_name) as f:
-                    content = f.read()
-                    try:
-                        return content.decode('utf-8')
-                    except UnicodeDecodeError:
-                        return "无法解码文件内容"
+                    if offset:
+                        f.seek(offset)
+                    content = f.read(-1 if length is None else length)
+            elif self.index is not None:
+                # 只解压涉及的帧
+                content = self.index.read(offset, length)
             else:
-                content = self.archive.read()
-                try:
-                    return content.decode('utf-8')
-                except UnicodeDecodeError:
-                    return "无法解码文件内容"
+                self.archive.seek(offset)
+                content = self.archive.read(-1 if length is None else length)
+            return self._decode(content, partial)
         
-        def search_content(self, keyword):
-            """搜索文件内容"""
-            results = []
+        def read_lines(self, start_line, count, file_name=None):
+            """
+            读取指定行范围（行号从 0 开始）
+            :param start_line: 起始行
+            :param count: 行数
+            :param file_name: ZIP 中的成员名称（单文件压缩格式忽略）
+            """
+            if self.index is not None:
+                return self.index.read_lines(start_line, count)
+            
+            import io
+            import itertools
             if isinstance(self.archive, zipfile.ZipFile):
-                for file_name in self.archive.namelist():
-                    if file_name.endswith(('.txt', '.py', '.md')):
-                        with self.archive.open(file_name) as f:
-                            content = f.read().decode('utf-8', errors='ignore')
-                            if keyword in content:
-                                results.append(file_name)
-            return results
+                stream = self.archive.open(file_name)
+            else:
+                self.archive.seek(0)
+                stream = self.archive
+            text = io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline='\n')
+            try:
+                return [line.rstrip('\n') for line in itertools.islice(text, start_line, start_line + count)]
+            finally:
+                text.detach()
+                if stream is not self.archive:
+                    stream.close()
+        
+        def search_content(self, keyword, regex=False, names_only=True, workers=1,
+                           extensions=('.txt', '.py', '.md'), chunk_size=SEARCH_CHUNK_SIZE, overlap=None):
+            """
+            搜索文件内容
+            成员被分块解压搜索，内存占用与成员大小无关；workers > 1 时成员分发到进程池
+            :param keyword: 关键字（regex=True 时为正则表达式）
+            :param regex: 是否使用正则表达式
+            :param names_only: 为 True 时只返回匹配的文件名，每个成员找到第一个匹配即停止
+            :param workers: 进程数
+            :param extensions: 只搜索这些扩展名的成员，None 表示全部
+            :param chunk_size: 每次解压读取的大小（字节）
+            :param overlap: 块之间的重叠字节数（见 _search_chunks）
+            :return: names_only 时为文件名列表，否则为 [(文件名, 字节偏移, 行号)]
+            """
+            from concurrent.futures import ProcessPoolExecutor
+            
+            args = (keyword, regex, names_only, overlap)
+            if isinstance(self.archive, zipfile.ZipFile):
+                members = [info.filename for info in self.archive.infolist()
+                           if not info.is_dir() and (extensions is None or info.filename.endswith(extensions))]
+                if workers > 1 and len(members) > 1:
+                    with ProcessPoolExecutor(max_workers=workers) as executor:
+                        futures = [executor.submit(_search_member, self.archive_path, member,
+                                                   keyword, regex, names_only, chunk_size, overlap)
+                                   for member in members]
+                        found = [future.result() for future in futures]
+                else:
+                    found = []
+                    for member in members:
+                        with self.archive.open(member) as f:
+                            chunks = iter(lambda: f.read(chunk_size), b'')
+                            found.append((member, _search_chunks(chunks, *args)))
+            else:
+                # 单文件压缩格式：直接在解压流上搜索
+                name = os.path.basename(self.archive_path)
+                if self.index is not None:
+                    chunks = self.index.iter_frames()
+                else:
+                    self.archive.seek(0)
+                    chunks = iter(lambda: self.archive.read(chunk_size), b'')
+                found = [(name, _search_chunks(chunks, *args))]
+            
+            if names_only:
+                return [member for member, hits in found if hits]
+            return [(member, offset, line) for member, hits in found for offset, line in hits]
         
         def close(self):
             """关闭压缩文件"""
             if self.archive:
                 self.archive.close()
+            if self.index is not None and self.index is not self.archive:
+                self.index.close()
     
     return ArchiveBrowser(archive_path)
 
@@ -302,16 +1530,33 @@ if __name__ == "__main__":
     
     # 测试压缩工具
     compression_tool("test.txt", compression_type="zip", level=9)
+    compression_tool("test.txt", compression_type="gzip", level=6, workers=4)
+    benchmark_compression("test.txt", levels=(1, 6))
+    compression_tool("test.txt", compression_type="auto", target_mb_s=20)
     
     # 测试增量备份
     backup_mgr = incremental_backup("test.txt", "backups")
     backup_mgr.create_full_backup()
     backup_mgr.create_incremental_backup()
+    name = backup_mgr.create_chunked_backup()
+    backup_mgr.verify_backup(name)
+    backup_mgr.restore_backup(name, "restored")
+    backup_mgr.collect_garbage()
     
     # 测试文件分割器
-    file_splitter("test.txt", chunk_size=1024)
+    manifest = file_splitter("test.txt", chunk_size=1024)
+    file_joiner(manifest, "test_joined.txt", overwrite=True)
     
     # 测试压缩文件浏览器
     browser = compression_browser("test.zip")
     print(browser.list_contents())
+    print(browser.search_content("test"))
+    print(browser.search_content(r"te.t", regex=True, names_only=False, workers=2))
+    browser.close()
+    
+    # 测试可随机访问的压缩文件
+    compression_tool("test.txt", compression_type="seekable")
+    browser = compression_browser("test.txt.skz")
+    print(browser.preview_text(offset=0, length=100))
+    print(browser.read_lines(0, 5))
     browser.close() 
\ No newline at end of file
@@ -3,20 +3,189 @@
 import os
 import chardet
 import codecs
+import functools
+import heapq
+import time
+from collections import Counter
+from operator import itemgetter
 from datetime import datetime
 
+DETECT_CHUNK_SIZE = 64 * 1024             # 每次交给 chardet 的字节数
+DETECT_CONFIDENCE = 0.95                  # 置信度达到该值即停止检测
+DETECT_SAMPLE_SIZE = 1024 * 1024          # 大文件每个采样窗口的字节数
+DETECT_SAMPLE_THRESHOLD = 8 * 1024 * 1024  # 超过该大小的文件只检测开头、中间和结尾三个窗口
+
+# BOM 与 chardet 使用的编码名称（UTF-32 LE 的 BOM 以 UTF-16 LE 的 BOM 开头，必须先检查）
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'UTF-32'),
+    (codecs.BOM_UTF32_BE, 'UTF-32'),
+    (codecs.BOM_UTF8, 'UTF-8-SIG'),
+    (codecs.BOM_UTF16_LE, 'UTF-16'),
+    (codecs.BOM_UTF16_BE, 'UTF-16'),
+)
+
+def _detection_windows(f, size, chunk_size, sample_size, sample_threshold):
+    """
+    产出检测用的数据块：小文件按顺序产出全部内容；
+    大文件通过 mmap 只产出开头、中间、结尾三个窗口（每个窗口再切成 chunk_size 的块）
+    产出 (数据块, 是否为窗口的开始, 是否为文件的结尾)
+    """
+    if size <= sample_threshold:
+        first = True
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk, first, f.tell() >= size
+            first = False
+    
+    import mmap
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for start in (0, (size - sample_size) // 2, size - sample_size):
+            end = start + sample_size
+            for offset in range(start, end, chunk_size):
+                yield mm[offset:min(offset + chunk_size, end)], offset == start, min(offset + chunk_size, end) >= size
+
+def _peek_confidence(detector):
+    """
+    UniversalDetector 只在 close() 后给出结果；这里读取各个探测器当前的最高置信度，
+    以便在达到自定义阈值时提前结束（探测器列表是 chardet 的内部属性，取不到时只依赖 detector.done）
+    """
+    probers = getattr(detector, '_charset_probers', None) or ()
+    return max((prober.get_confidence() for prober in probers), default=0.0)
+
+def detect_encoding(file_path, confidence=DETECT_CONFIDENCE, chunk_size=DETECT_CHUNK_SIZE,
+                    sample_size=DETECT_SAMPLE_SIZE, sample_threshold=DETECT_SAMPLE_THRESHOLD):
+    """
+    检测文件编码，返回与 chardet.detect 相同格式的结果
+    1. 有 BOM 时直接返回对应编码
+    2. 全部是 ASCII，或者是严格合法的 UTF-8（且不含 NUL 字节）时不调用 chardet
+    3. 否则逐块交给 chardet.UniversalDetector，置信度达到阈值就停止
+    超过 sample_threshold 的文件只检测三个采样窗口，耗时与文件大小基本无关
+    :param file_path: 文件路径
+    :param confidence: 提前停止的置信度阈值
+    :param chunk_size: 每次读取的字节数
+    :param sample_size: 采样窗口大小
+    :param sample_threshold: 开始采样的文件大小
+    :return: {'encoding': 编码, 'confidence': 置信度, 'language': 语言}
+    """
+    from chardet.universaldetector import UniversalDetector
+    
+    size = os.path.getsize(file_path)
+    if size == 0:
+        return {'encoding': None, 'confidence': 0.0, 'language': None}
+    
+    with open(file_path, 'rb') as f:
+        head = f.read(4)
+        for bom, encoding in BOMS:
+            if head.startswith(bom):
+                return {'encoding': encoding, 'confidence': 1.0, 'language': ''}
+        f.seek(0)
+        
+        # 快速路径：ASCII / 严格 UTF-8
+        is_ascii = True
+        decoder = None
+        for chunk, window_start, at_end in _detection_windows(f, size, chunk_size, sample_size, sample_threshold):
+            if window_start:
+                # 采样窗口可能从多字节字符的中间开始，跳过开头的续字节
+                skip = 0
+                if decoder is not None:
+                    while skip < 3 and skip < len(chunk) and 0x80 <= chunk[skip] <= 0xBF:
+                        skip += 1
+                chunk = chunk[skip:]
+                decoder = codecs.getincrementaldecoder('utf-8')()
+            if b'\x00' in chunk:
+                # 没有 BOM 的 UTF-16/32 文本中 ASCII 字符带有 NUL 字节，
+                # 能通过 ASCII / UTF-8 检查，交给 chardet 判断
+                break
+            if is_ascii and chunk.isascii():
+                continue
+            is_ascii = False
+            try:
+                decoder.decode(chunk, final=at_end)
+            except UnicodeDecodeError:
+                break
+        else:
+            if is_ascii:
+                return {'encoding': 'ascii', 'confidence': 1.0, 'language': ''}
+            return {'encoding': 'utf-8', 'confidence': 0.99, 'language': ''}
+        
+        # 交给 chardet
+        f.seek(0)
+        detector = UniversalDetector()
+        for chunk, _, _ in _detection_windows(f, size, chunk_size, sample_size, sample_threshold):
+            detector.feed(chunk)
+            if detector.done or _peek_confidence(detector) >= confidence:
+                break
+        detector.close()
+        return detector.result
+
+def _find_decode_error(file_path, encoding, chunk_size=DETECT_CHUNK_SIZE):
+    """
+    按块用增量解码器检查文件能否以指定编码解码
+    :return: 第一个错误的描述（位置为文件中的字节偏移），没有错误时为 None
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    consumed = 0
+    with open(file_path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            pending = decoder.getstate()[0]
+            try:
+                decoder.decode(chunk, final=not chunk)
+            except UnicodeDecodeError as e:
+                start = consumed - len(pending) + e.start
+                end = consumed - len(pending) + e.end
+                if e.end - e.start == 1:
+                    return (f"'{e.encoding}' codec can't decode byte 0x{e.object[e.start]:02x} "
+                            f"in position {start}: {e.reason}")
+                return f"'{e.encoding}' codec can't decode bytes in position {start}-{end - 1}: {e.reason}"
+            if not chunk:
+                return None
+            consumed += len(chunk)
+
+def benchmark_detector(paths, **options):
+    """
+    检测器对比：对每个文件分别用 chardet.detect（读取整个文件）和 detect_encoding 检测，
+    比较耗时和结果是否一致（编码名称不区分大小写，ASCII 视为 UTF-8 的子集）
+    :param paths: 测试文件列表
+    :param options: 传给 detect_encoding 的参数
+    :return: {'files', 'agree', 'full_seconds', 'sampled_seconds', 'disagreements'}
+    """
+    def normalize(encoding):
+        encoding = (encoding or '').lower()
+        return 'utf-8' if encoding in ('ascii', 'utf-8') else encoding
+    
+    summary = {'files': 0, 'agree': 0, 'full_seconds': 0.0, 'sampled_seconds': 0.0, 'disagreements': []}
+    for path in paths:
+        start_time = time.perf_counter()
+        with open(path, 'rb') as f:
+            full = chardet.detect(f.read())
+        summary['full_seconds'] += time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        sampled = detect_encoding(path, **options)
+        summary['sampled_seconds'] += time.perf_counter() - start_time
+        summary['files'] += 1
+        if normalize(full['encoding']) == normalize(sampled['encoding']):
+            summary['agree'] += 1
+        else:
+            summary['disagreements'].append((path, full['encoding'], sampled['encoding']))
+    
+    print(f"编码检测对比（{summary['files']} 个文件）：")
+    print(f"  结果一致：{summary['agree']}/{summary['files']}")
+    print(f"  chardet.detect：{summary['full_seconds']:.2f} 秒，detect_encoding：{summary['sampled_seconds']:.2f} 秒")
+    for path, full_encoding, sampled_encoding in summary['disagreements']:
+        print(f"  不一致：{path}：{full_encoding} / {sampled_encoding}")
+    return summary
+
 def encoding_detector(file_path):
     """
     编码检测器
     :param file_path: 文件路径
     """
     try:
-        # 读取文件内容
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-        
-        # 检测编码
-        result = chardet.detect(raw_data)
+        # 检测编码（只读取检测所需的部分）
+        result = detect_encoding(file_path)
         
         print(f"文件编码检测结果：")
         print(f"文件：{file_path}")
@@ -29,27 +198,120 @@ def encoding_detector(file_path):
         print(f"检测编码时发生错误：{str(e)}")
         return None
 
-def encoding_converter(source_path, target_path, target_encoding):
+TRANSCODE_BLOCK_SIZE = 1024 * 1024  # 流式转码时每次读取的字节数
+
+def transcode_file(source_path, target_path, target_encoding='utf-8', source_encoding=None,
+                   decode_errors='strict', encode_errors='strict', block_size=TRANSCODE_BLOCK_SIZE):
     """
-    编码转换器
+    流式转码：按块读取，增量解码器处理跨块的多字节字符，边解码边编码写出，内存占用与文件大小无关
+    源编码与目标编码相同（或 ASCII 转 UTF-8）时直接复制字节
+    结果先写入临时文件，成功后才替换目标文件（保留目标文件原来的权限）；源文件和目标文件可以是同一个文件
+    :param source_path: 源文件路径
+    :param target_path: 目标文件路径
+    :param target_encoding: 目标编码
+    :param source_encoding: 源编码，None 表示用 detect_encoding 检测
+    :param decode_errors: 解码错误处理方式（strict/replace/ignore/backslashreplace/surrogateescape）
+    :param encode_errors: 编码错误处理方式（strict/replace/ignore/xmlcharrefreplace/backslashreplace）
+    :param block_size: 每次读取的字节数
+    :return: {'source_encoding', 'target_encoding', 'bytes_in', 'bytes_out', 'copied'}
+    """
+    import shutil
+    
+    if source_encoding is None:
+        source_encoding = detect_encoding(source_path)['encoding']
+        if source_encoding is None:
+            source_encoding = 'utf-8'  # 空文件
+    source_codec = codecs.lookup(source_encoding).name
+    target_codec = codecs.lookup(target_encoding).name
+    
+    temp_path = f"{target_path}.{os.getpid()}.tmp"
+    bytes_in = bytes_out = 0
+    copied = source_codec == target_codec or (source_codec == 'ascii' and target_codec == 'utf-8')
+    try:
+        if copied:
+            shutil.copyfile(source_path, temp_path)
+            bytes_in = bytes_out = os.path.getsize(temp_path)
+        else:
+            decoder = codecs.getincrementaldecoder(source_codec)(decode_errors)
+            encoder = codecs.getincrementalencoder(target_codec)(encode_errors)
+            with open(source_path, 'rb') as f_in, open(temp_path, 'wb') as f_out:
+                while True:
+                    block = f_in.read(block_size)
+                    final = not block
+                    data = encoder.encode(decoder.decode(block, final), final)
+                    f_out.write(data)
+                    bytes_in += len(block)
+                    bytes_out += len(data)
+                    if final:
+                        break
+        # 临时文件是新建的，保留目标文件原来的权限（目标不存在时使用源文件的权限）
+        shutil.copymode(target_path if os.path.exists(target_path) else source_path, temp_path)
+        os.replace(temp_path, target_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    return {'source_encoding': source_encoding, 'target_encoding': target_encoding,
+            'bytes_in': bytes_in, 'bytes_out': bytes_out, 'copied': copied}
+
+def convert_tree(source_dir, target_encoding='utf-8', target_dir=None, workers=None,
+                 extensions=('.txt', '.csv', '.md', '.py', '.json', '.xml', '.html'), **options):
+    """
+    并行转码整个目录（进程池）
+    :param source_dir: 源目录
+    :param target_encoding: 目标编码
+    :param target_dir: 目标目录（保持相同的目录结构），None 表示原地转换
+    :param workers: 进程数，默认为 CPU 核数
+    :param extensions: 要转换的文件扩展名，None 表示全部文件
+    :param options: 传给 transcode_file 的其他参数
+    :return: {'files': {路径: 转码结果}, 'errors': {路径: 错误信息}, 'bytes_in', 'bytes_out'}
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    result = {'files': {}, 'errors': {}, 'bytes_in': 0, 'bytes_out': 0}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for root, dirs, files in os.walk(source_dir):
+            for name in files:
+                if extensions is not None and not name.lower().endswith(extensions):
+                    continue
+                source_path = os.path.join(root, name)
+                if target_dir is None:
+                    target_path = source_path
+                else:
+                    target_path = os.path.join(target_dir, os.path.relpath(source_path, source_dir))
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                futures[source_path] = executor.submit(transcode_file, source_path, target_path,
+                                                       target_encoding, **options)
+        for path, future in futures.items():
+            try:
+                converted = future.result()
+            except Exception as e:
+                result['errors'][path] = str(e)
+                continue
+            result['files'][path] = converted
+            result['bytes_in'] += converted['bytes_in']
+            result['bytes_out'] += converted['bytes_out']
+    return result
+
+def encoding_converter(source_path, target_path, target_encoding, decode_errors='strict', encode_errors='strict'):
+    """
+    编码转换器（流式转码）
     :param source_path: 源文件路径
     :param target_path: 目标文件路径
     :param target_encoding: 目标编码格式
+    :param decode_errors: 解码错误处理方式
+    :param encode_errors: 编码错误处理方式
     """
+    source_encoding = None
     try:
         # 检测源文件编码
-        with open(source_path, 'rb') as f:
-            raw_data = f.read()
-            result = chardet.detect(raw_data)
-            source_encoding = result['encoding']
+        source_encoding = detect_encoding(source_path)['encoding']
         
-        # 读取源文件
-        with open(source_path, 'r', encoding=source_encoding) as f:
-            content = f.read()
-        
-        # 写入目标文件
-        with open(target_path, 'w', encoding=target_encoding) as f:
-            f.write(content)
+        # 边读边写
+        transcode_file(source_path, target_path, target_encoding, source_encoding,
+                       decode_errors, encode_errors)
         
         print(f"编码转换完成：")
         print(f"源文件：{source_path} ({source_encoding})")
@@ -62,43 +324,253 @@ def encoding_converter(source_path, target_path, target_encoding):
     except Exception as e:
         print(f"转换过程中发生错误：{str(e)}")
 
-def text_cleaner(file_path):
+CLEAN_BLOCK_SIZE = 1024 * 1024  # 文本清理时每次读取的字符数
+FULLWIDTH_REPLACEMENTS = {'？': '?', '！': '!'}  # 全角标点替换规则
+
+@functools.lru_cache(maxsize=None)
+def _unprintable_ranges():
     """
-    文本清理器
-    :param file_path: 文件路径
+    BMP 中不可打印字符（str.isprintable() 为 False）的区间列表
+    换行符、回车符和制表符除外：制表符要么由替换表处理，要么按规则保留
     """
-    try:
-        # 读取文件内容
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 清理文本
-        cleaned_content = content
+    ranges = []
+    start = None
+    for code in range(0x10000):
+        char = chr(code)
+        unprintable = not char.isprintable() and char not in '\t\n\r'
+        if unprintable and start is None:
+            start = code
+        elif not unprintable and start is not None:
+            ranges.append((start, code - 1))
+            start = None
+    if start is not None:
+        ranges.append((start, 0xFFFF))
+    return tuple(ranges)
+
+def compile_cleaner(normalize_newlines=True, keep_tabs=False, tab_size=4, keep_fullwidth=False,
+                    remove_unprintable=True, replacements=None):
+    """
+    把清理规则编译为一个预编译正则和一组单字符替换
+    1. 正则只匹配需要删除的候选字符：BMP 中的不可打印字符（替换表中的字符除外，编译为位图字符集，
+       每个字符的判断是常数时间）和 BMP 以外的字符；正则是单个字符集，sre 可以快速跳过其余文本。
+       回调只在这些很少出现的字符上执行：BMP 字符直接删除，BMP 以外的字符用 isprintable 判断
+    2. 替换规则用 str.replace 逐条完成（C 实现，比带字典的 str.translate 快一个数量级）；
+       替换结果中含有其他规则的字符、逐条替换会连锁时退回 str.translate
+    先删除再替换，替换得到的文本不会再被删除，结果与逐字符处理相同
+    :param normalize_newlines: 统一换行符（\r\n、\r 转换为 \n）
+    :param keep_tabs: 保留制表符，False 时转换为 tab_size 个空格
+    :param tab_size: 制表符转换的空格数
+    :param keep_fullwidth: 保留全角标点，False 时按 FULLWIDTH_REPLACEMENTS 替换
+    :param remove_unprintable: 删除不可打印字符（换行符和保留的制表符除外）
+    :param replacements: 额外的单字符替换规则 {字符: 替换文本}，替换为 '' 或 None 表示删除
+    :return: TextCleaner 实例
+    """
+    import re
+    
+    rules = {}
+    if not keep_tabs:
+        rules['\t'] = ' ' * tab_size
+    if not keep_fullwidth:
+        rules.update(FULLWIDTH_REPLACEMENTS)
+    rules.update(replacements or {})
+    table = str.maketrans({char: value or '' for char, value in rules.items()})
+    
+    # 删除用的字符集：BMP 中的不可打印字符（去掉替换表中的字符）+ BMP 以外的全部字符
+    pattern = None
+    if remove_unprintable:
+        parts = []
+        for start, end in _unprintable_ranges():
+            for code in sorted(code for code in table if start <= code <= end) + [end + 1]:
+                if start < code:
+                    parts.append(f"\\u{start:04x}" if start == code - 1 else f"\\u{start:04x}-\\u{code - 1:04x}")
+                start = code + 1
+        parts.append('\\U00010000-\\U0010ffff')
+        pattern = re.compile(f"[{''.join(parts)}]")
+    
+    def _remove(match):
+        char = match.group()
+        return char if char > '\uffff' and (char.isprintable() or ord(char) in table) else ''
+    
+    # 替换结果不含任何规则字符时逐条 str.replace，否则用 str.translate 一次完成
+    chained = not any(key in (value or '') for value in rules.values() for key in rules)
+    steps = [(key, value or '') for key, value in rules.items()] if chained else None
+    
+    class TextCleaner:
+        def __init__(self):
+            self.table = table
+            self.pattern = pattern
+            self.normalize_newlines = normalize_newlines
         
-        # 统一换行符
-        cleaned_content = cleaned_content.replace('\r\n', '\n').replace('\r', '\n')
+        def _clean_block(self, text):
+            """删除不可打印字符并按规则替换（不处理换行符）"""
+            if pattern is not None:
+                text = pattern.sub(_remove, text)
+            if steps is None:
+                return text.translate(table)
+            for key, value in steps:
+                if key in text:
+                    text = text.replace(key, value)
+            return text
         
-        # 处理特殊字符
-        cleaned_content = cleaned_content.replace('\t', '    ')  # 制表符转换为空格
+        def clean(self, text):
+            """清理一段文本"""
+            if normalize_newlines and '\r' in text:
+                text = text.replace('\r\n', '\n').replace('\r', '\n')
+            return self._clean_block(text)
         
-        # 删除不可见字符
-        cleaned_content = ''.join(char for char in cleaned_content if char.isprintable() or char == '\n')
+        def clean_file(self, file_path, output_path, encoding='utf-8', block_size=CLEAN_BLOCK_SIZE):
+            """
+            按块清理文件，内存占用与文件大小无关
+            统一换行符由文本模式的通用换行完成，其余规则都是单字符规则，不受块边界影响
+            :return: (读取的字符数, 写出的字符数)
+            """
+            newline = None if normalize_newlines else ''
+            chars_in = chars_out = 0
+            with open(file_path, 'r', encoding=encoding, newline=newline) as f_in, \
+                    open(output_path, 'w', encoding=encoding, newline=newline) as f_out:
+                while True:
+                    block = f_in.read(block_size)
+                    if not block:
+                        break
+                    cleaned = self._clean_block(block)
+                    f_out.write(cleaned)
+                    chars_in += len(block)
+                    chars_out += len(cleaned)
+            return chars_in, chars_out
+    
+    return TextCleaner()
+
+def _cleaned_path(file_path):
+    return f"{os.path.splitext(file_path)[0]}_cleaned.txt"
+
+def _clean_file(file_path, output_path, rules, encoding):
+    """在工作进程中清理单个文件（规则以参数字典传入，在进程内编译）"""
+    return compile_cleaner(**rules).clean_file(file_path, output_path, encoding)
+
+def text_cleaner(file_path, output_path=None, workers=None, encoding='utf-8', extensions=('.txt',), **rules):
+    """
+    文本清理器
+    默认规则：统一换行符，制表符转换为 4 个空格，删除不可见字符，全角问号、感叹号转换为半角
+    :param file_path: 文件路径；为目录时并行清理其中的文件
+    :param output_path: 输出文件路径（目录输入时为输出目录，保持相同的目录结构），
+                        None 表示在原文件旁边生成 *_cleaned.txt
+    :param workers: 目录输入时的进程数，默认为 CPU 核数
+    :param encoding: 文件编码
+    :param extensions: 目录输入时要清理的文件扩展名
+    :param rules: 清理规则，见 compile_cleaner（例如 keep_tabs=True, keep_fullwidth=True）
+    """
+    try:
+        if not os.path.isdir(file_path):
+            if output_path is None:
+                output_path = _cleaned_path(file_path)
+            compile_cleaner(**rules).clean_file(file_path, output_path, encoding)
+            
+            print(f"文本清理完成：")
+            print(f"原始文件：{file_path}")
+            print(f"清理后文件：{output_path}")
+            return
         
-        # 修复常见的编码问题
-        cleaned_content = cleaned_content.replace('？', '?').replace('！', '!')
+        from concurrent.futures import ProcessPoolExecutor
         
-        # 保存清理后的文件
-        output_path = f"{os.path.splitext(file_path)[0]}_cleaned.txt"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(cleaned_content)
+        compile_cleaner(**rules)  # 提前检查规则
+        errors = {}
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for root, dirs, files in os.walk(file_path):
+                for name in files:
+                    if not name.lower().endswith(extensions):
+                        continue
+                    source_path = os.path.join(root, name)
+                    if output_path is None:
+                        if name.endswith('_cleaned.txt'):
+                            continue
+                        target_path = _cleaned_path(source_path)
+                    else:
+                        target_path = os.path.join(output_path, os.path.relpath(source_path, file_path))
+                        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    futures[source_path] = executor.submit(_clean_file, source_path, target_path, rules, encoding)
+            for path, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    errors[path] = str(e)
         
         print(f"文本清理完成：")
-        print(f"原始文件：{file_path}")
-        print(f"清理后文件：{output_path}")
+        print(f"目录：{file_path}")
+        print(f"清理文件数：{len(futures) - len(errors)}")
+        for path, error in errors.items():
+            print(f"  失败：{path}：{error}")
     
     except Exception as e:
         print(f"清理过程中发生错误：{str(e)}")
 
+def benchmark_cleaner(size_mb=64, directory='.'):
+    """
+    文本清理性能测试：生成中英文混合文本（每行以制表符缩进，部分行含全角标点、表情符号和控制字符），
+    比较原来的多遍 replace + 逐字符过滤与 compile_cleaner 的吞吐量，并检查输出相同
+    :param size_mb: 生成的文件大小（MB）
+    :param directory: 测试文件所在目录
+    :return: {'size_mb', 'old_mb_per_s', 'new_mb_per_s'}
+    """
+    import random
+    
+    rng = random.Random(0)
+    words = ['编码', '字符', '统计', '数据处理', '東京', 'こんにちは', '北京欢迎你', 'hello', 'world',
+             'data', '2024', 'Python', '，', '。']
+    extras = [('？', 0.2), ('！', 0.1), ('😀', 0.1), ('\x07', 0.02), ('\u200b', 0.02)]  # (字符, 每行出现的概率)
+    lines = []
+    length = 0
+    while length < 1024 * 1024:
+        line = [rng.choice(words) for _ in range(rng.randint(5, 30))]
+        for char, probability in extras:
+            if rng.random() < probability:
+                line.insert(rng.randrange(len(line) + 1), char)
+        line = '\t' + ' '.join(line) + '\r\n'
+        lines.append(line)
+        length += len(line.encode('utf-8'))
+    block = ''.join(lines)
+    
+    source_path = os.path.join(directory, 'benchmark_cleaner.txt')
+    old_path = os.path.join(directory, 'benchmark_cleaner_old.txt')
+    new_path = os.path.join(directory, 'benchmark_cleaner_new.txt')
+    try:
+        with open(source_path, 'w', encoding='utf-8', newline='') as f:
+            for _ in range(size_mb):
+                f.write(block)
+        size = os.path.getsize(source_path)
+        
+        # 原来的实现
+        start_time = time.perf_counter()
+        with open(source_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        content = content.replace('\r\n', '\n').replace('\r', '\n')
+        content = content.replace('\t', '    ')
+        content = ''.join(char for char in content if char.isprintable() or char == '\n')
+        content = content.replace('？', '?').replace('！', '!')
+        with open(old_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        old_seconds = time.perf_counter() - start_time
+        del content
+        
+        start_time = time.perf_counter()
+        compile_cleaner().clean_file(source_path, new_path)
+        new_seconds = time.perf_counter() - start_time
+        
+        with open(old_path, 'rb') as f_old, open(new_path, 'rb') as f_new:
+            if f_old.read() != f_new.read():
+                raise AssertionError("compile_cleaner 的输出与原来的实现不同")
+    finally:
+        for path in (source_path, old_path, new_path):
+            if os.path.exists(path):
+                os.remove(path)
+    
+    size_mb = size / (1024 * 1024)
+    summary = {'size_mb': size_mb, 'old_mb_per_s': size_mb / old_seconds, 'new_mb_per_s': size_mb / new_seconds}
+    print(f"文本清理性能（{size_mb:.0f} MB）：")
+    print(f"  原实现：{summary['old_mb_per_s']:.1f} MB/秒，compile_cleaner：{summary['new_mb_per_s']:.1f} MB/秒"
+          f"（{summary['new_mb_per_s'] / summary['old_mb_per_s']:.1f}x）")
+    return summary
+
 def encoding_validator(file_path, expected_encoding='utf-8'):
     """
     编码验证器
@@ -106,24 +578,18 @@ def encoding_validator(file_path, expected_encoding='utf-8'):
     :param expected_encoding: 期望的编码格式
     """
     try:
-        # 读取文件内容
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
-        
         # 检测实际编码
-        result = chardet.detect(raw_data)
+        result = detect_encoding(file_path)
         actual_encoding = result['encoding']
         
         # 验证编码
         is_valid = actual_encoding.lower() == expected_encoding.lower()
         
-        # 检查非法字符
+        # 检查非法字符（按块解码，不把整个文件读入内存）
         illegal_chars = []
-        try:
-            with open(file_path, 'r', encoding=expected_encoding) as f:
-                content = f.read()
-        except UnicodeDecodeError as e:
-            illegal_chars.append(str(e))
+        error = _find_decode_error(file_path, expected_encoding)
+        if error is not None:
+            illegal_chars.append(error)
         
         # 生成报告
         report = {
@@ -150,30 +616,239 @@ def encoding_validator(file_path, expected_encoding='utf-8'):
         print(f"验证过程中发生错误：{str(e)}")
         return None
 
-def encoding_analyzer(file_path):
+HISTOGRAM_BLOCK_SIZE = 4 * 1024 * 1024  # 直方图统计时每次读取的字节数
+
+def _is_line_compatible(encoding):
     """
-    编码分析器
+    换行符编码为单字节 0x0A、且编码无状态（每个字符的编码与上下文无关）
+    UTF-8、GBK、Big5、单字节编码等满足；UTF-16/UTF-32（0x0A 可能是字符的一部分）和 ISO-2022、HZ、UTF-7（有转义状态）不满足
+    """
+    name = codecs.lookup(encoding).name
+    return '\n'.encode(name) == b'\n' and not name.startswith(('iso2022', 'hz', 'utf-7'))
+
+def _byte_histogram(block, numpy):
+    """统计一个块的字节直方图，返回 256 个计数的列表"""
+    if numpy is not None:
+        return numpy.bincount(numpy.frombuffer(block, dtype=numpy.uint8), minlength=256).tolist()
+    counts = [0] * 256
+    for byte, count in Counter(block).items():
+        counts[byte] = count
+    return counts
+
+def _histogram_range(file_path, encoding, start, end, block_size=HISTOGRAM_BLOCK_SIZE):
+    """
+    统计文件 [start, end) 范围内的字节和字符直方图（可在工作进程中运行）
+    有 NumPy 时字节用 bincount 统计，字符编码为 UTF-32 后用 unique 统计；
+    否则字符用 Counter 统计（计数循环在 C 中完成）；UTF-8 的字节直方图由字符直方图换算，不再逐字节计数
+    （只有 UTF-8 保证合法字节序列与字符一一对应；cp932 等编码存在多个字节序列解码为同一字符的情况，
+    换算会得到错误的字节，因此仍逐字节计数）
+    :return: (256 个字节计数的列表, {字符: 次数}, 解码错误信息或 None)
+    """
+    try:
+        import numpy
+    except ImportError:
+        numpy = None
+    
+    derive_bytes = numpy is None and codecs.lookup(encoding).name == 'utf-8'
+    byte_counts = [0] * 256
+    char_counts = Counter()
+    error = None
+    decoder = codecs.getincrementaldecoder(encoding)()
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while True:
+            block = f.read(min(block_size, remaining))
+            remaining -= len(block)
+            final = not block
+            
+            # 字符直方图（出现解码错误后只继续统计字节）
+            if error is None:
+                try:
+                    text = decoder.decode(block, final)
+                except UnicodeDecodeError as e:
+                    error = str(e)
+                    char_counts = Counter()
+                    text = ''
+                    if derive_bytes:
+                        # 无法再由字符换算，重新统计已读取部分的字节
+                        derive_bytes = False
+                        position = f.tell() - len(block)
+                        with open(file_path, 'rb') as g:
+                            g.seek(start)
+                            while g.tell() < position:
+                                previous = g.read(min(block_size, position - g.tell()))
+                                byte_counts = [x + y for x, y in zip(byte_counts, _byte_histogram(previous, None))]
+                if text:
+                    if numpy is not None:
+                        codes = numpy.frombuffer(text.encode('utf-32-le', 'surrogatepass'), dtype='<u4')
+                        values, counts = numpy.unique(codes, return_counts=True)
+                        char_counts.update(dict(zip(map(chr, values.tolist()), counts.tolist())))
+                    else:
+                        char_counts.update(text)
+            
+            # 字节直方图
+            if block and not derive_bytes:
+                byte_counts = [x + y for x, y in zip(byte_counts, _byte_histogram(block, numpy))]
+            if final:
+                break
+    
+    if derive_bytes:
+        for char, count in char_counts.items():
+            for byte in char.encode(encoding):
+                byte_counts[byte] += count
+    return byte_counts, char_counts, error
+
+def _histogram_ranges(file_path, encoding, size, parts):
+    """
+    把文件切成 parts 个范围，切分点位于换行符之后
+    只对 _is_line_compatible 的编码切分，这些编码的多字节字符不含 0x0A，换行后解码状态也不延续；
+    其他编码整个文件作为一个范围
+    """
+    if parts <= 1 or size == 0 or not _is_line_compatible(encoding):
+        return [(0, size)]
+    boundaries = [0]
+    with open(file_path, 'rb') as f:
+        for i in range(1, parts):
+            position = max(size * i // parts, boundaries[-1])
+            f.seek(position)
+            while True:
+                chunk = f.read(64 * 1024)
+                if not chunk:
+                    position = size
+                    break
+                index = chunk.find(b'\n')
+                if index >= 0:
+                    position += index + 1
+                    break
+                position += len(chunk)
+            if position >= size:
+                break
+            boundaries.append(position)
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+def char_histogram(file_path, encoding=None, workers=None, block_size=HISTOGRAM_BLOCK_SIZE):
+    """
+    按块统计文件的字节直方图和字符直方图，内存占用与文件大小无关
+    workers 大于 1 时把文件按换行符切成多个范围并行统计，再合并各部分的结果
     :param file_path: 文件路径
+    :param encoding: 文件编码，None 表示用 detect_encoding 检测
+    :param workers: 进程数，默认为 CPU 核数
+    :param block_size: 每次读取的字节数
+    :return: {'encoding', 'bytes': 256 个字节计数的列表, 'chars': Counter, 'decode_error': 错误信息或 None}
+    """
+    if encoding is None:
+        encoding = detect_encoding(file_path)['encoding'] or 'ascii'
+    workers = workers or os.cpu_count() or 1
+    ranges = _histogram_ranges(file_path, encoding, os.path.getsize(file_path), workers)
+    
+    if len(ranges) == 1:
+        parts = [_histogram_range(file_path, encoding, *ranges[0], block_size)]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_histogram_range, file_path, encoding, start, end, block_size)
+                       for start, end in ranges]
+            parts = [future.result() for future in futures]
+    
+    # 合并各部分的直方图
+    byte_counts = [0] * 256
+    char_counts = Counter()
+    decode_error = None
+    for part_bytes, part_chars, part_error in parts:
+        byte_counts = [x + y for x, y in zip(byte_counts, part_bytes)]
+        if part_error is not None and decode_error is None:
+            decode_error = part_error
+        char_counts.update(part_chars)
+    if decode_error is not None:
+        char_counts = Counter()
+    return {'encoding': encoding, 'bytes': byte_counts, 'chars': char_counts, 'decode_error': decode_error}
+
+def benchmark_analyzer(size_mb=1024, directory='.', workers=None, baseline_mb=32):
+    """
+    字符统计性能测试：生成中文、日文与 ASCII 混合的 UTF-8 文本，
+    比较逐字符字典计数（原 encoding_analyzer 的做法）与 char_histogram 的吞吐量，
+    并检查两者在前 baseline_mb 上的结果相同
+    逐字符计数需要把整个文件解码到内存，只在前 baseline_mb 上测量
+    :param size_mb: 生成的文件大小（MB）
+    :param directory: 测试文件所在目录
+    :param workers: char_histogram 的进程数
+    :param baseline_mb: 逐字符计数测量的数据量（MB）
+    :return: {'size_mb', 'loop_mb_per_s', 'histogram_mb_per_s', 'histogram_seconds'}
     """
+    import random
+    
+    rng = random.Random(0)
+    words = ['编码', '字符', '统计', '数据处理', '東京', 'こんにちは', 'テスト', '北京欢迎你',
+             'hello', 'world', 'data', 'encoding', '2024', 'Python', '，', '。']
+    blocks = []
+    for _ in range(16):
+        lines = []
+        length = 0
+        while length < 1024 * 1024:
+            line = ' '.join(rng.choice(words) for _ in range(rng.randint(5, 30))) + '\n'
+            lines.append(line)
+            length += len(line.encode('utf-8'))
+        blocks.append(''.join(lines).encode('utf-8'))
+    
+    path = os.path.join(directory, 'benchmark_analyzer.txt')
     try:
-        # 读取文件内容
-        with open(file_path, 'rb') as f:
-            raw_data = f.read()
+        size = 0
+        with open(path, 'wb') as f:
+            while size < size_mb * 1024 * 1024:
+                block = blocks[(size // len(blocks[0])) % len(blocks)]
+                f.write(block)
+                size += len(block)
         
-        # 检测编码
-        result = chardet.detect(raw_data)
+        # 逐字符字典计数（只测量前 baseline_mb）
+        with open(path, 'rb') as f:
+            head = f.read(min(baseline_mb * 1024 * 1024, size))
+        head = head[:head.rfind(b'\n') + 1]
+        start_time = time.perf_counter()
+        loop_counts = {}
+        for char in head.decode('utf-8'):
+            if char in loop_counts:
+                loop_counts[char] += 1
+            else:
+                loop_counts[char] = 1
+        loop_seconds = time.perf_counter() - start_time
+        if _histogram_range(path, 'utf-8', 0, len(head))[1] != loop_counts:
+            raise AssertionError("char_histogram 与逐字符计数的结果不同")
         
-        # 分析字符分布
-        char_distribution = {}
-        try:
-            content = raw_data.decode(result['encoding'])
-            for char in content:
-                if char in char_distribution:
-                    char_distribution[char] += 1
-                else:
-                    char_distribution[char] = 1
-        except UnicodeDecodeError:
-            pass
+        start_time = time.perf_counter()
+        histogram = char_histogram(path, 'utf-8', workers)
+        histogram_seconds = time.perf_counter() - start_time
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    
+    size_mb = size / (1024 * 1024)
+    summary = {
+        'size_mb': size_mb,
+        'loop_mb_per_s': len(head) / (1024 * 1024) / loop_seconds,
+        'histogram_mb_per_s': size_mb / histogram_seconds,
+        'histogram_seconds': histogram_seconds
+    }
+    print(f"字符统计性能（{size_mb:.0f} MB，{len(histogram['chars'])} 种字符）：")
+    print(f"  逐字符计数：{summary['loop_mb_per_s']:.1f} MB/秒（前 {len(head) / (1024 * 1024):.0f} MB）")
+    print(f"  char_histogram：{summary['histogram_mb_per_s']:.1f} MB/秒（{histogram_seconds:.2f} 秒）")
+    return summary
+
+def encoding_analyzer(file_path, top_k=10, workers=None):
+    """
+    编码分析器
+    :param file_path: 文件路径
+    :param top_k: 打印出现次数最多的字符数
+    :param workers: 统计字符分布的进程数
+    """
+    try:
+        # 检测编码（只读取检测所需的部分）
+        result = detect_encoding(file_path)
+        
+        # 分析字节和字符分布（按块统计，不把整个文件读入内存）
+        histogram = char_histogram(file_path, result['encoding'] or 'ascii', workers)
+        char_distribution = histogram['chars']
         
         # 检测潜在的编码问题
         potential_issues = []
@@ -188,6 +863,7 @@ def encoding_analyzer(file_path):
             'encoding': result['encoding'],
             'confidence': result['confidence'],
             'char_distribution': char_distribution,
+            'byte_distribution': histogram['bytes'],
             'potential_issues': potential_issues
         }
         
@@ -196,7 +872,7 @@ def encoding_analyzer(file_path):
         print(f"编码：{result['encoding']}")
         print(f"置信度：{result['confidence']:.2%}")
         print(f"字符分布：")
-        for char, count in sorted(char_distribution.items(), key=lambda x: x[1], reverse=True)[:10]:
+        for char, count in heapq.nlargest(top_k, char_distribution.items(), key=itemgetter(1)):
             print(f"  '{char}': {count}")
         if potential_issues:
             print(f"潜在问题：")
@@ -209,6 +885,211 @@ def encoding_analyzer(file_path):
         print(f"分析过程中发生错误：{str(e)}")
         return None
 
+SCAN_CACHE_NAME = '.encoding_scan_cache.jsonl'  # scan_encodings 默认的缓存文件名（位于扫描根目录）
+SCAN_BATCH_SIZE = 64  # 每个进程池任务处理的文件数
+
+class ScanProgress:
+    """
+    scan_encodings 的进度计数器
+    计数只在主进程中更新；调用方可以在其他线程中轮询，或者通过 on_progress 回调读取
+    """
+    def __init__(self):
+        self.discovered = 0   # 已发现的文件数
+        self.done = 0         # 已完成的文件数（包括缓存命中）
+        self.cached = 0       # 缓存命中的文件数
+        self.errors = 0       # 出错的文件数
+        self.bytes_done = 0   # 已完成文件的总字节数
+        self.finished = False
+        self.start_time = time.perf_counter()
+    
+    @property
+    def seconds(self):
+        return time.perf_counter() - self.start_time
+    
+    @property
+    def files_per_second(self):
+        return self.done / max(self.seconds, 1e-9)
+    
+    @property
+    def mb_per_second(self):
+        return self.bytes_done / (1024 * 1024) / max(self.seconds, 1e-9)
+    
+    def __str__(self):
+        total = f"{self.discovered}" if self.finished else f"{self.discovered}+"
+        return (f"{self.done}/{total} 个文件（缓存 {self.cached}，错误 {self.errors}），"
+                f"{self.files_per_second:,.0f} 个/秒，{self.mb_per_second:.1f} MB/秒")
+
+def _walk_files(root, extensions, skip):
+    """用 os.scandir 遍历目录树（不跟随符号链接），产出 (路径, stat)；无法访问的目录被跳过"""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                if extensions is not None and not entry.name.lower().endswith(extensions):
+                    continue
+                if entry.path == skip:
+                    continue
+                yield entry.path, entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+
+def _scan_batch(batch, expected_encoding, options):
+    """
+    在工作进程中检测一批文件
+    :param batch: [(路径, size, mtime_ns, inode)]
+    :return: [(路径, 记录或 None, 错误信息或 None)]
+    """
+    results = []
+    for path, size, mtime_ns, inode in batch:
+        try:
+            detected = detect_encoding(path, **options)
+            record = {'path': path, 'size': size, 'mtime_ns': mtime_ns, 'inode': inode,
+                      'encoding': detected['encoding'], 'confidence': detected['confidence'],
+                      'expected_encoding': expected_encoding}
+            if expected_encoding is not None:
+                error = _find_decode_error(path, expected_encoding)
+                record['is_valid'] = error is None
+                record['decode_error'] = error
+            results.append((path, record, None))
+        except Exception as e:
+            results.append((path, None, str(e)))
+    return results
+
+def _load_scan_cache(cache_path):
+    """读取扫描缓存（JSON Lines），返回 {路径: 记录}；损坏的行被忽略"""
+    import json
+    
+    cache = {}
+    if not os.path.exists(cache_path):
+        return cache
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+                cache[record['path']] = record
+            except (ValueError, KeyError, TypeError):
+                continue
+    return cache
+
+def _write_scan_records(records, output_path):
+    """按扩展名把记录写成 JSON Lines 或 CSV（先写临时文件再替换）"""
+    import csv
+    import json
+    
+    temp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8', newline='') as f:
+            if output_path.lower().endswith('.csv'):
+                fields = ['path', 'size', 'mtime_ns', 'inode', 'encoding', 'confidence',
+                          'expected_encoding', 'is_valid', 'decode_error']
+                writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(records)
+            else:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        os.replace(temp_path, output_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def scan_encodings(root, workers=None, expected_encoding=None, extensions=None, report_path=None,
+                   cache_path=None, use_cache=True, progress=None, on_progress=None,
+                   batch_size=SCAN_BATCH_SIZE, **options):
+    """
+    并行检测整个目录树中文件的编码
+    用 os.scandir 遍历，每批 batch_size 个文件交给进程池；遍历与检测同时进行，
+    同时提交的批次数有上限，内存占用与文件数无关（结果记录除外）
+    缓存以 (路径, size, mtime_ns, inode) 为键，这四项都没有变化的文件直接使用上次的结果
+    :param root: 根目录
+    :param workers: 进程数，默认为 CPU 核数
+    :param expected_encoding: 期望的编码，不为 None 时同时检查文件能否以该编码解码
+    :param extensions: 要检测的文件扩展名元组，None 表示全部文件
+    :param report_path: 报告路径，.csv 输出 CSV，其他扩展名输出 JSON Lines；None 表示不输出
+    :param cache_path: 缓存文件路径，默认为根目录下的 SCAN_CACHE_NAME
+    :param use_cache: 是否读写缓存
+    :param progress: ScanProgress 实例，None 表示新建
+    :param on_progress: 每完成一批调用 on_progress(progress)
+    :param batch_size: 每个任务的文件数
+    :param options: 传给 detect_encoding 的参数
+    :return: {'files': [记录], 'errors': {路径: 错误信息}, 'progress': ScanProgress}
+    """
+    from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+    
+    root = os.path.abspath(root)
+    if cache_path is None:
+        cache_path = os.path.join(root, SCAN_CACHE_NAME)
+    cache_path = os.path.abspath(cache_path)
+    cache = _load_scan_cache(cache_path) if use_cache else {}
+    progress = ScanProgress() if progress is None else progress
+    records, errors = [], {}
+    
+    def collect(future):
+        for path, record, error in future.result():
+            if record is None:
+                errors[path] = error
+                progress.errors += 1
+            else:
+                records.append(record)
+                progress.bytes_done += record['size']
+            progress.done += 1
+        if on_progress is not None:
+            on_progress(progress)
+    
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending, batch = set(), []
+        
+        def submit(batch):
+            nonlocal pending
+            while len(pending) >= workers * 4:
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    collect(future)
+            pending.add(executor.submit(_scan_batch, batch, expected_encoding, options))
+        
+        for path, st in _walk_files(root, extensions, cache_path):
+            progress.discovered += 1
+            entry = cache.get(path)
+            if (entry is not None and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns
+                    and entry['inode'] == st.st_ino and entry.get('expected_encoding') == expected_encoding):
+                records.append(entry)
+                progress.cached += 1
+                progress.done += 1
+                progress.bytes_done += st.st_size
+                continue
+            batch.append((path, st.st_size, st.st_mtime_ns, st.st_ino))
+            if len(batch) >= batch_size:
+                submit(batch)
+                batch = []
+        if batch:
+            submit(batch)
+        for future in pending:
+            collect(future)
+    progress.finished = True
+    
+    records.sort(key=lambda record: record['path'])
+    if use_cache:
+        _write_scan_records(records, cache_path)
+    if report_path is not None:
+        _write_scan_records(records, report_path)
+    
+    print(f"编码扫描完成：{root}")
+    print(f"  {progress}")
+    return {'files': records, 'errors': errors, 'progress': progress}
+
 # 测试代码
 if __name__ == "__main__":
     # 测试编码检测器
@@ -224,4 +1105,7 @@ if __name__ == "__main__":
     encoding_validator("test.txt", "utf-8")
     
     # 测试编码分析器
-    encoding_analyzer("test.txt") 
\ No newline at end of file
+    encoding_analyzer("test.txt")
+    
+    # 测试目录编码扫描
+    scan_encodings(".", expected_encoding="utf-8", extensions=('.txt', '.csv'), report_path="encoding_report.csv") 
\ No newline at end of file
@@ -2,7 +2,6 @@
 
 import os
 import shutil
-import time
 import re
 from datetime import datetime
 import fnmatch
@@ -365,48 +364,29 @@ def filesystem_monitor(directory):
             self.directory = os.path.abspath(directory)
             self.log_file = f"fs_monitor_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
             self.running = False
+            self.source = None
         
-        def start_monitoring(self, interval=1):
-            """开始监控"""
-            self.running = True
-            self._initial_state = self._get_current_state()
+        def start_monitoring(self, interval=1, backend='auto'):
+            """
+            开始监控
+            :param interval: 轮询间隔（秒），仅轮询后端使用
+            :param backend: 事件后端（auto/inotify/polling）
+            """
+            from fs_events import open_event_source
             
-            while self.running:
-                current_state = self._get_current_state()
-                self._check_changes(current_state)
-                time.sleep(interval)
+            self.running = True
+            # 轮询后端使用增量快照，只重新扫描 mtime 变化的目录
+            self.source = open_event_source(self.directory, backend=backend, interval=interval)
+            for event_type, path in self.source.events():
+                self._log_event(event_type, path)
+                if not self.running:
+                    break
         
         def stop_monitoring(self):
             """停止监控"""
             self.running = False
-        
-        def _get_current_state(self):
-            """获取当前文件系统状态"""
-            state = {}
-            for root, dirs, files in os.walk(self.directory):
-                for item in dirs + files:
-                    path = os.path.join(root, item)
-                    state[path] = {
-                        'mtime': os.path.getmtime(path),
-                        'size': os.path.getsize(path) if os.path.isfile(path) else 0
-                    }
-            return state
-        
-        def _check_changes(self, current_state):
-            """检查变化"""
-            # 检查新文件和修改
-            for path, info in current_state.items():
-                if path not in self._initial_state:
-                    self._log_event('created', path)
-                elif info['mtime'] > self._initial_state[path]['mtime']:
-                    self._log_event('modified', path)
-            
-            # 检查删除
-            for path in self._initial_state:
-                if path not in current_state:
-                    self._log_event('deleted', path)
-            
-            self._initial_state = current_state
+            if self.source:
+                self.source.close()
         
         def _log_event(self, event_type, path):
             """记录事件"""
@@ -0,0 +1,515 @@
+# 文件系统事件源
+# Linux 上通过 ctypes 调用 inotify，由内核推送变化；其他平台退回轮询（定期扫描并对比）
+# 两种后端都输出合并、去抖后的 (event_type, path) 记录，event_type 为 created/modified/deleted
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import asyncio
+from array import array
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, len
+
+def _merge_event(previous, current):
+    """
+    合并同一路径上的两个事件
+    :return: 合并后的事件类型；None 表示两个事件相互抵消
+    """
+    if previous is None:
+        return current
+    if previous == 'created':
+        return None if current == 'deleted' else 'created'
+    if previous == 'deleted':
+        return 'modified' if current == 'created' else current
+    return current
+
+class EventSource:
+    """事件源基类：负责合并与去抖，子类只需实现 _read_raw()"""
+    def __init__(self, directory, debounce=0.1, max_delay=1.0):
+        self.directory = os.path.abspath(directory)
+        if not os.path.isdir(self.directory):
+            raise FileNotFoundError(errno.ENOENT, "要监控的目录不存在", self.directory)
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.closed = False
+
+    def _read_raw(self, timeout):
+        """等待最多 timeout 秒，返回这段时间内的原始事件列表"""
+        raise NotImplementedError
+
+    def events(self):
+        """
+        事件生成器：同一路径的多次变化被合并，
+        在 debounce 秒内没有新事件（或已累积 max_delay 秒）时输出一批
+        """
+        pending = {}
+        batch_start = None
+        try:
+            while not self.closed:
+                raw = self._read_raw(self.debounce if pending else max(self.debounce, 0.5))
+                for event_type, path in raw:
+                    merged = _merge_event(pending.pop(path, None), event_type)
+                    if merged is not None:
+                        pending[path] = merged
+                    if batch_start is None:
+                        batch_start = time.monotonic()
+
+                quiet = not raw
+                overdue = batch_start is not None and time.monotonic() - batch_start >= self.max_delay
+                if pending and (quiet or overdue):
+                    batch, pending, batch_start = pending, {}, None
+                    for path, event_type in batch.items():
+                        yield event_type, path
+                elif not pending:
+                    batch_start = None
+            # 事件源结束（例如监控的目录被删除）时输出剩余的事件
+            for path, event_type in pending.items():
+                yield event_type, path
+        finally:
+            self._release()
+
+    async def aevents(self):
+        """异步迭代器版本：在线程池中推进阻塞的生成器"""
+        loop = asyncio.get_running_loop()
+        generator = self.events()
+        sentinel = object()
+        while True:
+            event = await loop.run_in_executor(None, next, generator, sentinel)
+            if event is sentinel:
+                break
+            yield event
+
+    def close(self):
+        """停止事件源（可以在其他线程中调用）"""
+        self.closed = True
+
+    def _release(self):
+        """释放底层资源"""
+        pass
+
+class InotifyEventSource(EventSource):
+    """
+    基于 Linux inotify 的事件源，变化检测延迟与目录树大小无关
+    同时保留一份目录树快照：内核事件队列溢出（事件已丢失）时重新建立监视，
+    并通过快照对比补报这段时间的变化
+    """
+    def __init__(self, directory, debounce=0.1, max_delay=1.0):
+        super().__init__(directory, debounce, max_delay)
+        import ctypes
+        import ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._ctypes = ctypes
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        try:
+            self.watches = {}  # wd -> 目录路径
+            # 超出 max_user_watches 等错误向上抛出，open_event_source 据此退回轮询
+            self._add_tree(self.directory)
+            self.snapshot = SnapshotIndex(self.directory)
+        except BaseException:
+            self._release()
+            raise
+        self.touched = set()       # 上次同步快照后事件中出现过的路径
+        self.max_touched = 100000  # 超过后刷新快照并清空，限制内存占用
+
+    def _add_watch(self, path):
+        """为单个目录添加监视"""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = self._ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        self.watches[wd] = path
+
+    def _remove_watches(self, directory):
+        """移除目录及其子目录的监视（目录被移出后，旧路径上的监视不再有效）"""
+        prefix = os.path.join(directory, '')
+        for wd, path in list(self.watches.items()):
+            if path == directory or path.startswith(prefix):
+                self._libc.inotify_rm_watch(self.fd, wd)
+                del self.watches[wd]
+
+    def _add_tree(self, directory, report=None):
+        """
+        递归监视目录树
+        目录已消失或无权限时跳过其子树；其他错误（例如超出 max_user_watches 的 ENOSPC）向上抛出
+        :param report: 事件列表；新建目录时把监视生效前已出现的内容补报为 created
+        """
+        for root, dirs, files in os.walk(directory):
+            try:
+                self._add_watch(root)
+            except OSError as e:
+                if e.errno not in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    raise
+                dirs[:] = []
+                continue
+            if report is not None and root != directory:
+                report.append(('created', root))
+            if report is not None:
+                report.extend(('created', os.path.join(root, name)) for name in files)
+
+    def _watch_new_tree(self, directory, report=None):
+        """运行中为新出现的目录添加监视；无法监视时报告错误（该子树中的变化将不会被报告）"""
+        try:
+            self._add_tree(directory, report)
+        except OSError as e:
+            print(f"无法监视目录，其中的变化不会被报告：{e}")
+
+    def _read_raw(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+
+        raw = []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return raw
+
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+
+            parent = self.watches.get(wd)
+            if parent is None:
+                continue
+            path = os.path.join(parent, os.fsdecode(name)) if name else parent
+
+            if mask & (IN_CREATE | IN_MOVED_TO):
+                raw.append(('created', path))
+                if mask & IN_ISDIR:
+                    self._watch_new_tree(path, report=raw)
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                raw.append(('deleted', path))
+                if mask & IN_MOVED_FROM and mask & IN_ISDIR:
+                    # 移到别处的目录：移入树内其他位置时由 IN_MOVED_TO 按新路径重新监视
+                    self._remove_watches(path)
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if path == self.directory:
+                    # 监控的目录本身被删除或移走，事件源结束
+                    raw.append(('deleted', path))
+                    self.closed = True
+            elif mask & (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE):
+                raw.append(('modified', path))
+
+        if self.closed or not self.watches:
+            self.closed = True
+            return raw
+        self.touched.update(path for _, path in raw)
+        if overflow:
+            raw.extend(self._resync())
+        elif len(self.touched) > self.max_touched:
+            # 这些变化已经由 inotify 报告过，刷新结果直接丢弃
+            self.snapshot.refresh()
+            self.touched.clear()
+        return raw
+
+    def _resync(self):
+        """
+        内核队列溢出后的恢复：为溢出期间新建的目录补上监视，再与快照对比得到变化；
+        快照之后报告过、现在已不存在的路径补报为 deleted
+        （快照不随事件更新，因此结果可能包含之前已经报告过的变化）
+        """
+        self._watch_new_tree(self.directory)
+        report = self.snapshot.refresh()
+        report.extend(('deleted', path) for path in self.touched if not os.path.lexists(path))
+        self.touched.clear()
+        return report
+
+    def _release(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class SnapshotIndex:
+    """
+    目录树快照（轮询后端使用）
+    每个目录保存一份紧凑记录：目录自身的 mtime、子项名称元组，以及与名称平行的
+    mtime/size 数组（array('q')）；路径和名称均经过 sys.intern，重复扫描不会产生新字符串。
+    刷新时只对 mtime 变化的目录重新 scandir；其余目录只在 check_files=True 时逐个 stat 文件，
+    用来发现内容修改（目录 mtime 只在增删、重命名子项时变化）
+    """
+    def __init__(self, directory, check_files=True):
+        self.directory = sys.intern(os.path.abspath(directory))
+        self.check_files = check_files
+        self.dirs = {}  # 目录路径 -> (mtime_ns, 名称元组, mtime 数组, size 数组, 子目录名称集合)
+        self._scan_dir(self.directory)
+
+    def __len__(self):
+        return sum(len(record[1]) for record in self.dirs.values())
+
+    def _read_dir(self, path):
+        """读取单个目录，返回快照记录；目录不可访问时返回 None"""
+        try:
+            dir_mtime = os.stat(path).st_mtime_ns
+            entries = list(os.scandir(path))
+        except OSError:
+            return None
+        names, mtimes, sizes, subdirs = [], array('q'), array('q'), set()
+        for entry in entries:
+            try:
+                st = entry.stat(follow_symlinks=False)
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                continue
+            name = sys.intern(entry.name)
+            names.append(name)
+            mtimes.append(st.st_mtime_ns)
+            sizes.append(0 if is_dir else st.st_size)
+            if is_dir:
+                subdirs.add(name)
+        return (dir_mtime, tuple(names), mtimes, sizes, subdirs)
+
+    def _scan_dir(self, path, report=None):
+        """扫描目录及其子树，report 不为 None 时把新出现的路径记为 created"""
+        record = self._read_dir(path)
+        if record is None:
+            return
+        self.dirs[path] = record
+        names, subdirs = record[1], record[4]
+        for name in names:
+            child = os.path.join(path, name)
+            if report is not None:
+                report.append(('created', child))
+            if name in subdirs:
+                self._scan_dir(sys.intern(child), report)
+
+    def _drop_dir(self, path, report):
+        """移除目录及其子树的记录，并把其中的路径记为 deleted"""
+        record = self.dirs.pop(path, None)
+        if record is None:
+            return
+        for name in record[1]:
+            child = os.path.join(path, name)
+            if name in record[4]:
+                self._drop_dir(child, report)
+            report.append(('deleted', child))
+
+    def refresh(self):
+        """
+        与上一次快照对比并更新
+        :return: 原始事件列表 [(event_type, path)]
+        """
+        report = []
+        for path in list(self.dirs):
+            record = self.dirs.get(path)
+            if record is None:  # 已随父目录一起移除
+                continue
+            old_mtime, old_names, old_mtimes, old_sizes, old_subdirs = record
+            try:
+                dir_mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue  # 目录已删除，由父目录的重新扫描报告
+
+            if dir_mtime != old_mtime:
+                self._rescan_dir(path, record, report)
+                if path != self.directory:
+                    report.append(('modified', path))
+            elif self.check_files:
+                for i, name in enumerate(old_names):
+                    if name in old_subdirs:
+                        continue
+                    try:
+                        st = os.stat(os.path.join(path, name), follow_symlinks=False)
+                    except OSError:
+                        continue  # 删除会改变目录 mtime，下次刷新时处理
+                    if st.st_mtime_ns != old_mtimes[i] or st.st_size != old_sizes[i]:
+                        old_mtimes[i] = st.st_mtime_ns
+                        old_sizes[i] = st.st_size
+                        report.append(('modified', os.path.join(path, name)))
+        return report
+
+    def _rescan_dir(self, path, record, report):
+        """重新扫描 mtime 变化的目录，对比子项"""
+        _, old_names, old_mtimes, old_sizes, old_subdirs = record
+        previous = {name: i for i, name in enumerate(old_names)}
+        new_record = self._read_dir(path)
+        if new_record is None:
+            return
+        self.dirs[path] = new_record
+        _, names, mtimes, sizes, subdirs = new_record
+
+        for i, name in enumerate(names):
+            child = os.path.join(path, name)
+            j = previous.pop(name, None)
+            if j is None or (name in subdirs) != (name in old_subdirs):
+                if j is not None:
+                    # 同名但类型改变（文件 <-> 目录）
+                    if name in old_subdirs:
+                        self._drop_dir(child, report)
+                    report.append(('deleted', child))
+                report.append(('created', child))
+                if name in subdirs:
+                    self._scan_dir(sys.intern(child), report)
+            elif name not in subdirs and (mtimes[i] != old_mtimes[j] or sizes[i] != old_sizes[j]):
+                report.append(('modified', child))
+
+        for name in previous:
+            child = os.path.join(path, name)
+            if name in old_subdirs:
+                self._drop_dir(child, report)
+            report.append(('deleted', child))
+
+class PollingEventSource(EventSource):
+    """轮询事件源：每隔 interval 秒刷新一次快照并输出差异"""
+    def __init__(self, directory, interval=1, debounce=0.1, max_delay=1.0, scan=None, check_files=True):
+        """
+        :param scan: 自定义扫描函数，返回 {路径: 签名}，签名不同即视为修改；
+                     默认使用增量快照 SnapshotIndex
+        :param check_files: 快照刷新时是否逐个检查文件的修改（见 SnapshotIndex）
+        """
+        super().__init__(directory, debounce, max_delay)
+        self.interval = interval
+        self.scan = scan
+        if scan is None:
+            self.snapshot = SnapshotIndex(self.directory, check_files=check_files)
+        else:
+            self.state = scan()
+        self.next_scan = time.monotonic() + interval
+
+    def _diff_scan(self):
+        """使用自定义扫描函数时的整体对比"""
+        current = self.scan()
+        previous = self.state
+        self.state = current
+        raw = [('created', path) for path in current if path not in previous]
+        raw.extend(('modified', path) for path, signature in current.items()
+                   if path in previous and previous[path] != signature)
+        raw.extend(('deleted', path) for path in previous if path not in current)
+        return raw
+
+    def _read_raw(self, timeout):
+        wait = self.next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(wait, 0))
+        self.next_scan = time.monotonic() + self.interval
+
+        if not os.path.isdir(self.directory):
+            # 监控的目录被删除，事件源结束
+            self.closed = True
+            return [('deleted', self.directory)]
+        if self.scan is None:
+            return self.snapshot.refresh()
+        return self._diff_scan()
+
+def inotify_available():
+    """当前平台是否可以使用 inotify"""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6')
+        return hasattr(libc, 'inotify_init1')
+    except OSError:
+        return False
+
+def open_event_source(directory, backend='auto', interval=1, debounce=0.1, scan=None):
+    """
+    创建事件源
+    :param directory: 要监控的目录
+    :param backend: auto/inotify/polling；auto 在 inotify 可用时优先使用
+    :param interval: 轮询间隔（秒），仅轮询后端使用
+    :param debounce: 去抖时间（秒）
+    :param scan: 轮询后端使用的扫描函数
+    """
+    if backend not in ('auto', 'inotify', 'polling'):
+        raise ValueError(f"不支持的事件后端：{backend}")
+    if backend == 'inotify' or (backend == 'auto' and inotify_available()):
+        try:
+            return InotifyEventSource(directory, debounce=debounce)
+        except OSError:
+            # 例如超出 max_user_watches 限制
+            if backend == 'inotify':
+                raise
+    return PollingEventSource(directory, interval=interval, debounce=debounce, scan=scan)
+
+def _legacy_state(directory):
+    """旧的轮询方式：遍历整棵树并对每个路径调用 getmtime/getsize（用于性能对比）"""
+    state = {}
+    for root, dirs, files in os.walk(directory):
+        for item in dirs + files:
+            path = os.path.join(root, item)
+            state[path] = {
+                'mtime': os.path.getmtime(path),
+                'size': os.path.getsize(path) if os.path.isfile(path) else 0
+            }
+    return state
+
+def benchmark_snapshot(file_count=200000, files_per_dir=1000, ticks=3, directory=None):
+    """
+    对比轮询一次的开销：旧的整体扫描 vs 增量快照
+    :param file_count: 合成目录树中的文件数
+    :param files_per_dir: 每个目录中的文件数
+    :param ticks: 每种方式测量的轮询次数
+    :param directory: 合成目录树的位置，默认使用临时目录
+    :return: {方式: 每次轮询的平均秒数}
+    """
+    import shutil
+    import tempfile
+
+    root = tempfile.mkdtemp(dir=directory)
+    try:
+        for i in range(file_count):
+            subdir = os.path.join(root, f"d{i // files_per_dir:04d}")
+            if i % files_per_dir == 0:
+                os.makedirs(subdir)
+            open(os.path.join(subdir, f"f{i}.txt"), 'w').close()
+
+        def measure(tick):
+            start_time = time.perf_counter()
+            for _ in range(ticks):
+                tick()
+            return (time.perf_counter() - start_time) / ticks
+
+        snapshot = SnapshotIndex(root, check_files=True)
+        structure_only = SnapshotIndex(root, check_files=False)
+        results = {
+            '整体扫描 (os.walk + getmtime/getsize)': measure(lambda: _legacy_state(root)),
+            '增量快照 (check_files=True)': measure(snapshot.refresh),
+            '增量快照 (check_files=False)': measure(structure_only.refresh),
+        }
+    finally:
+        shutil.rmtree(root)
+
+    print(f"轮询开销对比（{file_count} 个文件，每目录 {files_per_dir} 个）：")
+    for name, seconds in results.items():
+        print(f"  {name:<40}{seconds * 1000:>10.1f} ms/次")
+    return results
@@ -0,0 +1,250 @@
+# 序列化性能测试工具
+# 生成不同形状的合成数据集，用 03_file_serialization 中的序列化器对每种格式做编码和解码，
+# 记录吞吐量、内存峰值（tracemalloc）、输出大小和往返一致性；结果保存为 JSON，
+# compare_results 可以比较两次运行，找出性能退化
+
+import os
+import sys
+import json
+import time
+import random
+import platform
+import tempfile
+import tracemalloc
+import importlib
+from datetime import datetime
+
+serialization = importlib.import_module('03_file_serialization')
+
+DATASET_SHAPES = ('flat', 'nested', 'wide', 'unicode')
+
+def generate_dataset(shape, records=10000, seed=0):
+    """
+    生成合成数据集（字典记录列表）
+    flat：少量标量字段；nested：多层嵌套的字典和列表；
+    wide：200 个字段；unicode：以中文、日文和表情符号为主的长文本
+    :param shape: 数据集形状
+    :param records: 记录数
+    :param seed: 随机数种子，相同参数生成的数据相同
+    """
+    rng = random.Random(seed)
+
+    def nested(depth):
+        if depth == 0:
+            return {'value': rng.randint(0, 1000), 'label': f"leaf{rng.randint(0, 99)}"}
+        return {'level': depth, 'items': [nested(depth - 1) for _ in range(2)], 'flag': rng.random() < 0.5}
+
+    texts = ['北京欢迎你', '東京タワー', '😀🎉🚀', 'Ünïcödé', '机器学习与数据处理', 'こんにちは世界']
+    data = []
+    for i in range(records):
+        if shape == 'flat':
+            record = {'id': i, 'name': f"user{i}", 'score': round(rng.random() * 100, 3),
+                      'active': rng.random() < 0.5, 'city': rng.choice(['北京', '上海', '广州', '深圳'])}
+        elif shape == 'nested':
+            record = {'id': i, 'tree': nested(4), 'tags': [f"t{rng.randint(0, 9)}" for _ in range(3)]}
+        elif shape == 'wide':
+            record = {f"col{j}": rng.randint(0, 10 ** 6) if j % 2 else f"v{rng.randint(0, 999)}" for j in range(200)}
+        elif shape == 'unicode':
+            record = {'id': i, 'title': ''.join(rng.choice(texts) for _ in range(3)),
+                      'body': ' '.join(rng.choice(texts) for _ in range(30))}
+        else:
+            raise ValueError(f"不支持的数据集形状：{shape}")
+        data.append(record)
+    return data
+
+def _is_flat(records):
+    """记录的字段是否都是标量（CSV 和列式格式只支持扁平记录）"""
+    return all(not isinstance(value, (dict, list)) for record in records[:100] for value in record.values())
+
+def _write_with(extension, compact=False):
+    def encode(records, path):
+        serialization.write_records(records, path, True, compact)
+
+    def decode(path):
+        is_list, records = serialization.read_records(path)
+        return list(records)
+    return extension, encode, decode
+
+def _pickle_format(out_of_band):
+    def encode(records, path):
+        serialization.object_serializer(records, 'pickle', output_path=path, out_of_band=out_of_band,
+                                        raise_errors=True)
+
+    def decode(path):
+        return serialization.object_deserializer(path, 'pickle', raise_errors=True)
+    return '.pickle', encode, decode
+
+# 格式名称 -> (扩展名, encode(records, path), decode(path) -> records, 是否只支持扁平记录)
+FORMATS = {
+    'pickle': _pickle_format(False) + (False,),
+    'pickle-oob': _pickle_format(True) + (False,),
+    'json': _write_with('.json') + (False,),
+    'json-compact': _write_with('.json', compact=True) + (False,),
+    'jsonl': _write_with('.jsonl') + (False,),
+    'yaml': _write_with('.yaml') + (False,),
+    'xml': _write_with('.xml') + (False,),
+    'csv': _write_with('.csv') + (True,),
+    'columnar': _write_with('.col') + (True,),
+}
+
+def _normalize(value):
+    """把值转换为字符串形式，用于判断只丢失了类型信息的往返（例如 CSV、XML）"""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return None if value is None else str(value)
+
+def _fidelity(original, decoded):
+    """往返一致性：exact（完全相同）、types（只有类型变为字符串）或 lossy（内容不同）"""
+    if decoded == original:
+        return 'exact'
+    if decoded is not None and _normalize(decoded) == _normalize(original):
+        return 'types'
+    return 'lossy'
+
+def _measure(func, repeat):
+    """
+    运行 repeat 次取最快耗时，再在 tracemalloc 下运行一次测量内存峰值
+    :return: (最后一次的返回值, 耗时秒数, 内存峰值字节数)
+    """
+    seconds = float('inf')
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        result = func()
+        seconds = min(seconds, time.perf_counter() - start_time)
+    del result
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+def _file_size(path):
+    size = os.path.getsize(path)
+    if os.path.exists(path + '.buffers'):
+        size += os.path.getsize(path + '.buffers')
+    return size
+
+def run_benchmarks(shapes=DATASET_SHAPES, formats=None, records=10000, repeat=3, output_path=None, directory=None):
+    """
+    对每个数据集和格式执行编码、解码测试
+    :param shapes: 数据集形状
+    :param formats: 格式名称列表，None 表示全部
+    :param records: 每个数据集的记录数
+    :param repeat: 计时重复次数
+    :param output_path: 结果 JSON 文件路径，None 表示不保存
+    :param directory: 临时文件目录，None 表示系统临时目录
+    :return: 结果字典 {'meta': ..., 'results': [...]}
+    """
+    formats = list(FORMATS) if formats is None else formats
+    results = []
+    with tempfile.TemporaryDirectory(dir=directory) as temp_dir:
+        for shape in shapes:
+            data = generate_dataset(shape, records)
+            flat = _is_flat(data)
+            for name in formats:
+                extension, encode, decode, flat_only = FORMATS[name]
+                if flat_only and not flat:
+                    continue
+                path = os.path.join(temp_dir, f"{shape}_{name}{extension}")
+                try:
+                    _, encode_seconds, encode_peak = _measure(lambda: encode(data, path), repeat)
+                    decoded, decode_seconds, decode_peak = _measure(lambda: decode(path), repeat)
+                except Exception as e:
+                    results.append({'dataset': shape, 'format': name, 'error': str(e)})
+                    continue
+                size = _file_size(path)
+                results.append({
+                    'dataset': shape,
+                    'format': name,
+                    'records': records,
+                    'size_bytes': size,
+                    'encode_seconds': encode_seconds,
+                    'decode_seconds': decode_seconds,
+                    'encode_records_per_s': records / encode_seconds,
+                    'decode_records_per_s': records / decode_seconds,
+                    'encode_mb_per_s': size / (1024 * 1024) / encode_seconds,
+                    'decode_mb_per_s': size / (1024 * 1024) / decode_seconds,
+                    'encode_peak_bytes': encode_peak,
+                    'decode_peak_bytes': decode_peak,
+                    'fidelity': _fidelity(data, decoded)
+                })
+                del decoded
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'json_backend': serialization.DEFAULT_JSON_BACKEND,
+            'libyaml': serialization.yaml_io.LIBYAML_AVAILABLE,
+            'records': records,
+            'repeat': repeat
+        },
+        'results': results
+    }
+    if output_path is not None:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+    print_report(report)
+    return report
+
+def print_report(report):
+    """打印结果表格"""
+    print(f"序列化性能（每个数据集 {report['meta']['records']} 条记录）：")
+    print(f"  {'数据集':<8}{'格式':<14}{'大小(KB)':>10}{'编码 条/秒':>14}{'解码 条/秒':>14}"
+          f"{'编码峰值(KB)':>14}{'解码峰值(KB)':>14}  一致性")
+    for r in report['results']:
+        if 'error' in r:
+            print(f"  {r['dataset']:<10}{r['format']:<14}错误：{r['error']}")
+            continue
+        print(f"  {r['dataset']:<10}{r['format']:<14}{r['size_bytes'] / 1024:>12.0f}"
+              f"{r['encode_records_per_s']:>16,.0f}{r['decode_records_per_s']:>16,.0f}"
+              f"{r['encode_peak_bytes'] / 1024:>16,.0f}{r['decode_peak_bytes'] / 1024:>16,.0f}  {r['fidelity']}")
+
+def compare_results(old_path, new_path, threshold=0.1):
+    """
+    比较两次运行的结果，列出变慢、内存或大小增长超过 threshold、一致性变差以及
+    原来成功、现在出错的项
+    :param old_path: 基准结果 JSON
+    :param new_path: 新结果 JSON
+    :param threshold: 允许的相对增长
+    :return: 退化列表 [(数据集, 格式, 指标, 旧值, 新值)]
+    """
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = {(r['dataset'], r['format']): r for r in json.load(f)['results']}
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = {(r['dataset'], r['format']): r for r in json.load(f)['results']}
+
+    fidelity_rank = {'exact': 0, 'types': 1, 'lossy': 2}
+    regressions = []
+    for key in sorted(old.keys() & new.keys()):
+        if 'error' in new[key]:
+            if 'error' not in old[key]:
+                regressions.append(key + ('error', 'ok', new[key]['error']))
+            continue
+        if 'error' in old[key]:
+            continue
+        for metric in ('encode_seconds', 'decode_seconds', 'encode_peak_bytes', 'decode_peak_bytes', 'size_bytes'):
+            if new[key][metric] > old[key][metric] * (1 + threshold):
+                regressions.append(key + (metric, old[key][metric], new[key][metric]))
+        if fidelity_rank[new[key]['fidelity']] > fidelity_rank[old[key]['fidelity']]:
+            regressions.append(key + ('fidelity', old[key]['fidelity'], new[key]['fidelity']))
+
+    for dataset, name, metric, old_value, new_value in regressions:
+        print(f"  退化：{dataset}/{name} {metric}：{old_value} -> {new_value}")
+    if not regressions:
+        print("没有发现退化")
+    return regressions
+
+if __name__ == "__main__":
+    previous = 'serialization_benchmark.json'
+    current = 'serialization_benchmark.new.json'
+    run_benchmarks(records=5000, output_path=current)
+    if os.path.exists(previous):
+        compare_results(previous, current)
+    os.replace(current, previous)
@@ -0,0 +1,102 @@
+# 文件压缩练习题的测试
+
+import os
+import re
+import sys
+import random
+import shutil
+import tempfile
+import importlib
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+compression = importlib.import_module('02_file_compression')
+
+def split_chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def whole_search(data, pattern):
+    """对整个数据调用 re.finditer 的结果：[(字节偏移, 行号)]"""
+    return [(m.start(), data.count(b'\n', 0, m.start()) + 1) for m in re.finditer(pattern, data)]
+
+class TestSearchChunks(unittest.TestCase):
+    """分块搜索与整体搜索结果一致"""
+    def test_overlapping_literal(self):
+        chunks = split_chunks(b'baaaaaabaa', 3)
+        self.assertEqual(compression._search_chunks(chunks, 'aa'), [(1, 1), (3, 1), (5, 1), (8, 1)])
+
+    def test_random_against_finditer(self):
+        rng = random.Random(0)
+        keywords = ['a', 'aa', 'ab', 'aba', 'b\nb']
+        patterns = [r'ab$', r'\bab', r'a(?=b)', r'(?<=b)a', r'(?<=ab)a', r'^a', r'(?m)^b', r'(?m)$',
+                    r'b\Z', r'a.b', r'\Ba\b']
+        unbounded = [r'a+', r'b*']  # 匹配长度不定，使用默认的重叠窗口
+        for _ in range(1000):
+            data = bytes(rng.choice(b'ab\n ') for _ in range(rng.randint(0, 60)))
+            chunks = split_chunks(data, rng.randint(1, 9))
+            for keyword in keywords:
+                self.assertEqual(compression._search_chunks(chunks, keyword),
+                                 whole_search(data, re.escape(keyword.encode())), (keyword, data, chunks))
+            for pattern in patterns:
+                overlap = rng.choice([None, 4, 8])
+                self.assertEqual(compression._search_chunks(chunks, pattern, regex=True, overlap=overlap),
+                                 whole_search(data, pattern.encode()), (pattern, data, chunks, overlap))
+            for pattern in unbounded:
+                self.assertEqual(compression._search_chunks(chunks, pattern, regex=True),
+                                 whole_search(data, pattern.encode()), (pattern, data, chunks))
+
+    def test_names_only(self):
+        chunks = split_chunks(b'xxab\nab', 2)
+        self.assertEqual(compression._search_chunks(chunks, 'ab', names_only=True), [(2, 1)])
+
+def reference_cuts(data, min_size, avg_size, max_size):
+    """逐字节计算 Gear 哈希的切点"""
+    rng = random.Random(0x5EED)
+    gear = [rng.getrandbits(64) for _ in range(256)]
+    cuts, start = [], 0
+    while start < len(data):
+        end = len(data)
+        if end - start > min_size:
+            end = min(end, start + max_size)
+            h = 0
+            for i in range(start + min_size, end):
+                h = ((h << 1) + gear[data[i]]) & 0xFFFFFFFFFFFFFFFF
+                if not h & (avg_size - 1):
+                    end = i + 1
+                    break
+        cuts.append(end)
+        start = end
+    return cuts
+
+class TestChunkStore(unittest.TestCase):
+    """分块存储的切点与备份命名"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cuts_match_bytewise_gear_hash(self):
+        rng = random.Random(2)
+        for sizes in [(16, 64, 512), (0, 256, 4096), (1000, 4096, 1 << 16), (8, 2, 100)]:
+            store = compression.chunk_store(os.path.join(self.directory, 'store'), *sizes)
+            for data in (rng.randbytes(50000), bytes(20000), bytes(rng.choice(b'ab \n') for _ in range(50000))):
+                cuts, start = [], 0
+                while start < len(data):
+                    start = store._find_cut(data, start, len(data))
+                    cuts.append(start)
+                self.assertEqual(cuts, reference_cuts(data, *sizes), sizes)
+
+    def test_backup_names_unique_within_a_second(self):
+        source = os.path.join(self.directory, 'source')
+        os.makedirs(source)
+        with open(os.path.join(source, 'a.txt'), 'w') as f:
+            f.write('hello')
+        manager = compression.incremental_backup(source, os.path.join(self.directory, 'backup'))
+        os.makedirs(manager.backup_dir)
+        names = [manager.create_chunked_backup() for _ in range(5)]
+        self.assertEqual(len(set(names)), 5)
+        self.assertEqual(manager._chunked_backups(), names)
+
+if __name__ == "__main__":
+    unittest.main()
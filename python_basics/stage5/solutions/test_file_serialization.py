@@ -0,0 +1,243 @@
+# 文件序列化练习题的测试
+
+import io
+import os
+import sys
+import json
+import random
+import datetime
+import shutil
+import tempfile
+import importlib
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+serialization = importlib.import_module('03_file_serialization')
+
+JSON_ARRAYS = [
+    '[]',
+    '[1, 2, 3]',
+    '[12.5, 3.25e10, -7, 0, 1E-3, -0.5e+2]',
+    '[true, false, null, "a,b]", "\\"\\\\\\u4e2d"]',
+    '[{"a": [1, {"b": null}], "c": "x"}, [], {}, [[1.5]]]',
+    ' [ 1 ,\n\t2.75 , "三" ]  ',
+]
+
+class TestJsonArrayStream(unittest.TestCase):
+    """流式解析 JSON 数组"""
+    def decode(self, text, split, chunk_size):
+        start = len(text) - len(text.lstrip())
+        f = io.StringIO(text[split:])
+        return list(serialization._iter_json_array(f, start, text[:split], chunk_size))
+
+    def test_every_split_offset(self):
+        """在每个位置截断缓冲区，结果都与整体解析相同"""
+        for text in JSON_ARRAYS:
+            expected = json.loads(text)
+            first = len(text) - len(text.lstrip()) + 1
+            for split in range(first, len(text) + 1):
+                for chunk_size in (1, 2, 3, 7, 64):
+                    self.assertEqual(self.decode(text, split, chunk_size), expected, (text, split, chunk_size))
+
+    def test_random_arrays(self):
+        """随机数组、随机块大小"""
+        rng = random.Random(1)
+        values = [0, -1, 12.5, 3.25e10, 1e-7, True, False, None, 'x', 'a"b', [1, 2.5], {'k': -3}]
+        for _ in range(300):
+            data = [rng.choice(values) for _ in range(rng.randint(0, 8))]
+            text = json.dumps(data, separators=rng.choice([(',', ':'), (', ', ': ')]))
+            split = rng.randint(1, len(text))
+            self.assertEqual(self.decode(text, split, rng.randint(1, 8)), data)
+
+    def test_incomplete_array(self):
+        with self.assertRaises(ValueError):
+            self.decode('[1, 2', 2, 2)
+
+class TestJsonBackends(unittest.TestCase):
+    """所有已安装的 JSON 后端与标准库的结果相同"""
+    def test_non_finite_floats(self):
+        data = {'values': [1.5, None, float('nan'), float('inf'), -float('inf')], 'none': None}
+        for backend in serialization.JSON_BACKENDS:
+            for compact in (True, False):
+                text = serialization.json_dumps(data, compact, backend)
+                self.assertEqual(text, json.dumps(data, **({'separators': (',', ':')} if compact else {'indent': 4})),
+                                 (backend, compact))
+                self.assertEqual(repr(serialization.json_loads(text, backend)), repr(data), backend)
+
+    def test_round_trip(self):
+        data = {'a': [1, -2.5, 1e-7, 2 ** 70, True, None, '中文 "引号"'], 'b': {'c': []}}
+        for backend in serialization.JSON_BACKENDS:
+            self.assertEqual(serialization.json_loads(serialization.json_dumps(data, backend=backend), backend), data)
+
+class TestReadRecords(unittest.TestCase):
+    """read_records 的格式处理"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def read(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        is_list, records = serialization.read_records(path)
+        return is_list, list(records)
+
+    def test_json_number_at_chunk_boundary(self):
+        """数字在 STREAM_CHUNK_SIZE 边界处被截断"""
+        size = serialization.STREAM_CHUNK_SIZE
+        for pad in range(12):
+            text = '["' + 'x' * (size - 10 - pad) + '", 12.5, 3.25e10, 7]'
+            self.assertEqual(self.read('data.json', text), (True, json.loads(text)))
+
+    def test_yaml_documents_flattened_consistently(self):
+        """每个内容为序列的文档都展开，其他文档整体作为一条记录"""
+        self.assertEqual(self.read('data.yaml', '- 1\n- 2\n---\n- 3\n'), (True, [1, 2, 3]))
+        self.assertEqual(self.read('data.yaml', 'a: 1\n---\n- 2\n- 3\n---\nb: 4\n'),
+                         (True, [{'a': 1}, 2, 3, {'b': 4}]))
+        self.assertEqual(self.read('data.yaml', 'a: 1\n'), (False, [{'a': 1}]))
+
+class TestConfigManagerThreads(unittest.TestCase):
+    """ConfigManager 的并发读写"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'config.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_threads(self, targets):
+        threads = [threading.Thread(target=target) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def test_concurrent_writers_and_readers(self):
+        """读线程不会看到修改了一半的配置，快照不会在读取过程中变化"""
+        manager = serialization.config_manager(self.path, compact_threshold=100, check_interval=0)
+        errors = []
+        done = threading.Event()
+
+        def writer(n):
+            for i in range(100):
+                manager.set(f'{n}-{i}', [i, {'n': n}])
+
+        def reader():
+            previous = 0
+            while not done.is_set():
+                try:
+                    snapshot = manager.snapshot()
+                    items = list(snapshot.items())
+                    self.assertEqual(len(items), len(snapshot))
+                    self.assertGreaterEqual(len(items), previous)
+                    previous = len(items)
+                except Exception as e:
+                    errors.append(e)
+                    return
+
+        readers = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in readers:
+            thread.start()
+        self.run_threads([lambda n=n: writer(n) for n in range(4)])
+        done.set()
+        for thread in readers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(manager.snapshot()), 400)
+        self.assertEqual(manager.snapshot()['3-99'], (99, {'n': 3}))
+        reopened = serialization.config_manager(self.path)
+        self.assertEqual(reopened.get('3-99'), [99, {'n': 3}])
+
+    def test_reload_parsed_once(self):
+        """其他进程修改文件后，并发的读线程只有一个重新解析"""
+        manager = serialization.config_manager(self.path, check_interval=0)
+        other = serialization.config_manager(self.path, check_interval=None)
+        parse = manager._parse_config
+        calls = []
+        barrier = threading.Barrier(8)
+
+        def counting_parse():
+            calls.append(1)
+            return parse()
+
+        manager._parse_config = counting_parse
+        other.set('name', 'changed')
+        other.compact()
+
+        def reader():
+            barrier.wait()
+            for _ in range(50):
+                manager.snapshot()
+
+        self.run_threads([reader] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(manager.snapshot()['name'], 'changed')
+
+class TestConfigManagerLog(unittest.TestCase):
+    """变更日志的写入顺序和值的类型"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_log_write_failure_leaves_config_unchanged(self):
+        path = os.path.join(self.directory, 'config.json')
+        manager = serialization.config_manager(path, check_interval=None)
+        manager.set('kept', 1)
+        os.remove(path + '.log')
+        os.mkdir(path + '.log')  # 日志无法写入
+        with self.assertRaises(OSError):
+            manager.set('lost', 2)
+        with self.assertRaises(OSError):
+            with manager.batch():
+                manager.set('kept', 3)
+                manager.delete('kept')
+        self.assertEqual(dict(manager.snapshot()), {'kept': 1})
+
+    def test_replay_keeps_types_of_config_format(self):
+        """重放日志、合并后重新读取与修改后的内存中的配置相同"""
+        values = {'n': 5, 'f': 1.5, 's': 'a\nb  ', 'empty': '', 'none': None, 'nested': {'x': [1, 'y'], 'z': {}}}
+        for ext in ('json', 'yaml', 'xml'):
+            path = os.path.join(self.directory, 'config.' + ext)
+            manager = serialization.config_manager(path, check_interval=None)
+            for key, value in values.items():
+                manager.set(key, value)
+            if ext == 'yaml':
+                manager.set('date', datetime.date(2020, 1, 2))
+            with manager.batch():
+                manager.merge({'m': 2, 'n': 6})
+            expected = dict(manager.config)
+            self.assertEqual(dict(serialization.config_manager(path, check_interval=None).config), expected, ext)
+            manager.compact()
+            self.assertEqual(dict(serialization.config_manager(path, check_interval=None).config), expected, ext)
+        self.assertEqual(expected['n'], '6')
+        self.assertEqual(expected['empty'], None)
+
+class TestObjectPersistence(unittest.TestCase):
+    """对象持久化的版本摘要"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_partial_summary_line(self):
+        """保存时崩溃留下半行摘要，之后的保存和列出版本不受影响"""
+        store = serialization.object_persistence({'n': 1}, self.directory)
+        store.save()
+        with open(store.summary_file, 'ab') as f:
+            f.write(b'{"version":2,"timest')
+        store.obj = {'n': 2}
+        store.save()
+        reopened = serialization.object_persistence(None, self.directory)
+        self.assertEqual([summary['version'] for summary in reopened.list_versions()], [1, 2])
+        self.assertEqual(reopened.load(), {'n': 2})
+        self.assertEqual(reopened.load(1), {'n': 1})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+# YAML 读写的测试
+
+import os
+import sys
+import random
+import datetime
+import tempfile
+import shutil
+import unittest
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import yaml_io
+
+DOCUMENTS = [
+    'a: 1\nb: [1, 2.5, -3e4, .inf, -.inf, 0x1F, 0o17, 1_000]\nc: {x: null, y: ~, z: true, w: no}\n',
+    'text: |\n  line1\n  line2\n\nfolded: >\n  a\n  b\n\n  c\nq: "esc\\t\\u4e2d"\nsq: \'it\'\'s\'\n',
+    'base: &b {k: v, n: 1}\nderived:\n  <<: *b\n  n: 2\nlist: [*b, *b]\n',
+    'when: 2020-01-02\nat: 2020-01-02T03:04:05.5+08:00\nbin: !!binary aGVsbG8=\nset: !!set {a, b}\nomap: !!omap [a: 1, b: 2]\n',
+    '- 中文: 值\n- [ ]\n- {}\n- ""\n- "   "\n- - nested\n  - - deeper\n',
+    '--- 1\n--- [2]\n...\n--- {a: 3}\n',
+    '# only comment\n',
+]
+
+CONFIG = {
+    'name': '服务',
+    'port': 8080,
+    'ratio': 0.75,
+    'debug': False,
+    'owner': None,
+    'started': datetime.date(2020, 1, 2),
+    'hosts': ['a.example.com', 'b.example.com'],
+    'limits': {'cpu': 2, 'memory': '512Mi', 'paths': ['/tmp', '/var/log']},
+    'motd': 'line one\nline two\n',
+}
+
+def random_value(rng, depth=0):
+    """随机的嵌套数据：各种标量、需要引号的字符串、嵌套的列表和字典"""
+    if depth > 3 or rng.random() < 0.5:
+        return rng.choice([
+            lambda: rng.randint(-10 ** 6, 10 ** 6),
+            lambda: rng.choice([0.5, -1e-9, 1e300, float('inf'), 3.0]),
+            lambda: rng.choice([True, False, None]),
+            lambda: datetime.date(2020, 1, rng.randint(1, 28)),
+            lambda: datetime.datetime(2020, 1, 2, 3, 4, rng.randint(0, 59)),
+            lambda: rng.choice(['yes', 'null', '~', '1e3', '2020-01-02', '', ' ', '---', '...']),
+            lambda: ''.join(rng.choice('ab :#-?,[]{}&*!|>\'"\n\t中é\x07 0.e+') for _ in range(rng.randint(0, 100))),
+        ])()
+    if rng.random() < 0.5:
+        return [random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))]
+    return {str(random_value(rng, depth + 1)): random_value(rng, depth + 1) for _ in range(rng.randint(0, 5))}
+
+@unittest.skipUnless(yaml_io.LIBYAML_AVAILABLE, "没有安装 libyaml")
+class TestCMatchesPure(unittest.TestCase):
+    """C 实现与纯 Python 实现的结果相同"""
+    def test_load(self):
+        for text in DOCUMENTS:
+            self.assertEqual(list(yaml_io.load_all(text)), list(yaml_io.load_all(text, pure=True)), text)
+            if '---' not in text:
+                self.assertEqual(yaml_io.load(text), yaml_io.load(text, pure=True), text)
+
+    def test_streaming_loader(self):
+        """逐个构造顶层序列的元素，与整体解析相同"""
+        text = yaml_io.dump([CONFIG, [1, 2], 'x', {'a': [CONFIG]}])
+        loader = yaml_io.StreamingSafeLoader(text)
+        try:
+            for _ in range(3):  # StreamStart、DocumentStart、SequenceStart
+                loader.get_event()
+            items = []
+            while not loader.check_event(yaml.SequenceEndEvent):
+                items.append(loader.construct_document(loader.compose_node(None, None)))
+        finally:
+            loader.dispose()
+        self.assertEqual(items, yaml_io.load(text, pure=True))
+
+    def test_dump_text(self):
+        """常见的块格式数据输出的文本相同"""
+        for kwargs in [{}, {'allow_unicode': True}, {'sort_keys': False}, {'indent': 4}, {'explicit_start': True}]:
+            self.assertEqual(yaml_io.dump(CONFIG, **kwargs), yaml_io.dump(CONFIG, pure=True, **kwargs), kwargs)
+            self.assertEqual(yaml_io.dump([CONFIG] * 3, **kwargs), yaml_io.dump([CONFIG] * 3, pure=True, **kwargs))
+
+    def test_dump_round_trip(self):
+        """任意数据和输出格式：两种实现的输出重新解析后都得到原来的数据"""
+        rng = random.Random(0)
+        styles = [{}, {'default_flow_style': True}, {'default_flow_style': None}, {'default_style': '"'},
+                  {'width': 30}, {'allow_unicode': True}]
+        for _ in range(300):
+            data = {'root': random_value(rng)}
+            for kwargs in styles:
+                c_text = yaml_io.dump(data, **kwargs)
+                pure_text = yaml_io.dump(data, pure=True, **kwargs)
+                self.assertEqual(yaml_io.load(c_text, pure=True), data, (kwargs, c_text))
+                self.assertEqual(yaml_io.load(pure_text), data, (kwargs, pure_text))
+
+class TestLoadFileCache(unittest.TestCase):
+    """load_file 的缓存"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'config.yaml')
+        yaml_io.clear_cache()
+        self.parses = 0
+        load = yaml_io.load
+
+        def counting_load(stream, pure=False):
+            self.parses += 1
+            return load(stream, pure)
+
+        yaml_io.load = counting_load
+        self.addCleanup(setattr, yaml_io, 'load', load)
+
+    def tearDown(self):
+        yaml_io.clear_cache()
+        shutil.rmtree(self.directory)
+
+    def write(self, text, mtime_ns=None):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        if mtime_ns is not None:
+            os.utime(self.path, ns=(mtime_ns, mtime_ns))
+
+    def test_hit_returns_copy(self):
+        self.write('a: [1, 2]\n')
+        first = yaml_io.load_file(self.path)
+        first['a'].append(3)
+        self.assertEqual(yaml_io.load_file(self.path), {'a': [1, 2]})
+        self.assertEqual(self.parses, 1)
+
+    def test_mtime_change_invalidates(self):
+        """大小不变、修改时间变化"""
+        self.write('a: 1\n', mtime_ns=1_000_000_000)
+        self.assertEqual(yaml_io.load_file(self.path), {'a': 1})
+        self.write('a: 2\n', mtime_ns=2_000_000_000)
+        self.assertEqual(yaml_io.load_file(self.path), {'a': 2})
+        self.assertEqual(self.parses, 2)
+
+    def test_size_change_invalidates(self):
+        """修改时间不变、大小变化"""
+        self.write('a: 1\n', mtime_ns=1_000_000_000)
+        self.assertEqual(yaml_io.load_file(self.path), {'a': 1})
+        self.write('a: 12\n', mtime_ns=1_000_000_000)
+        self.assertEqual(yaml_io.load_file(self.path), {'a': 12})
+        self.assertEqual(self.parses, 2)
+
+    def test_cache_disabled(self):
+        self.write('a: 1\n')
+        yaml_io.load_file(self.path, cache=False)
+        yaml_io.load_file(self.path, cache=False)
+        self.assertEqual(self.parses, 2)
+
+if __name__ == "__main__":
+    unittest.main()
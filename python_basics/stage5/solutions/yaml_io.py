@@ -0,0 +1,180 @@
+# YAML 读写
+# libyaml 可用时使用 C 实现（CSafeLoader/CDumper），速度是纯 Python 实现的数倍；否则回退到纯 Python 实现
+# 两种实现的解析结果相同；输出在常见的块格式数据上文本相同，流格式的折行位置、顶层标量的文档结束标记 "..."、
+# 非特定标签（libyaml 写 "!"，纯 Python 实现写 "!!int" 等）可能不同，重新解析得到的数据相同
+
+import os
+import copy
+from collections import OrderedDict
+
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.resolver import Resolver
+
+try:
+    from yaml.cyaml import CParser
+except ImportError:
+    CParser = None
+
+LIBYAML_AVAILABLE = CParser is not None
+
+SafeLoader = yaml.CSafeLoader if LIBYAML_AVAILABLE else yaml.SafeLoader
+Dumper = yaml.CDumper if LIBYAML_AVAILABLE else yaml.Dumper
+
+if LIBYAML_AVAILABLE:
+    class StreamingSafeLoader(Composer, CParser, SafeConstructor, Resolver):
+        """
+        事件由 libyaml 解析，节点由 Composer 组装
+        CSafeLoader 只能整体组装一个文档；这里使用 Composer 的 compose_node，
+        可以逐个构造顶层序列的元素，内存占用取决于单个元素的大小
+        （Composer 排在 CParser 之前，节点组装只读取事件，不会与 C 实现的组装状态冲突）
+        """
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+else:
+    StreamingSafeLoader = yaml.SafeLoader
+
+def load(stream, pure=False):
+    """
+    解析单个 YAML 文档（安全加载）
+    :param stream: 字符串或文件对象
+    :param pure: 强制使用纯 Python 实现
+    """
+    return yaml.load(stream, Loader=yaml.SafeLoader if pure else SafeLoader)
+
+def load_all(stream, pure=False):
+    """逐个产出多文档流中的文档"""
+    yield from yaml.load_all(stream, Loader=yaml.SafeLoader if pure else SafeLoader)
+
+def dump(data, stream=None, pure=False, **kwargs):
+    """
+    输出 YAML，参数与 yaml.dump 相同
+    :param pure: 强制使用纯 Python 实现
+    """
+    return yaml.dump(data, stream, Dumper=yaml.Dumper if pure else Dumper, **kwargs)
+
+# 解析结果缓存：绝对路径 -> (mtime_ns, size, data)，最近使用的在末尾
+YAML_CACHE_SIZE = 32
+_cache = OrderedDict()
+
+def load_file(file_path, cache=True):
+    """
+    解析 YAML 文件，文件的修改时间和大小不变时直接返回缓存的结果
+    返回的是缓存的深拷贝，调用方可以随意修改
+    :param file_path: 文件路径
+    :param cache: 是否使用缓存
+    """
+    key = os.path.abspath(file_path)
+    stat = os.stat(key)
+    if cache:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            _cache.move_to_end(key)
+            return copy.deepcopy(entry[2])
+
+    with open(key, 'r', encoding='utf-8') as f:
+        data = load(f)
+    if cache:
+        _cache[key] = (stat.st_mtime_ns, stat.st_size, data)
+        _cache.move_to_end(key)
+        while len(_cache) > YAML_CACHE_SIZE:
+            _cache.popitem(last=False)
+        data = copy.deepcopy(data)
+    return data
+
+def iter_documents(file_path):
+    """逐个产出 YAML 文件中的文档，不缓存"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        yield from load_all(f)
+
+def clear_cache():
+    """清空解析结果缓存"""
+    _cache.clear()
+
+def benchmark_yaml(size_mb=50, directory='.'):
+    """
+    YAML 性能测试：生成指定大小的 YAML 文件，比较 C 实现与纯 Python 实现的
+    解析、输出耗时，检查两者的结果完全相同，并测量缓存命中时的耗时
+    :param size_mb: 生成的 YAML 大小（MB）
+    :param directory: 测试文件所在目录
+    :return: {操作: {'pure_seconds', 'c_seconds', 'speedup'}}
+    """
+    import time
+    import random
+
+    rng = random.Random(0)
+    records, row_id, size = [], 0, 0
+    while size < size_mb * 1024 * 1024:
+        chunk = [{'id': row_id + i, 'name': f"user{row_id + i}", 'city': rng.choice(['北京', '上海', '广州']),
+                  'score': rng.random(), 'tags': ['a', 'b'], 'meta': {'active': True, 'note': None}}
+                 for i in range(10000)]
+        size += len(yaml.dump(chunk, Dumper=Dumper, allow_unicode=True).encode('utf-8'))
+        records.extend(chunk)
+        row_id += len(chunk)
+
+    def timed(func):
+        start_time = time.perf_counter()
+        result = func()
+        return result, time.perf_counter() - start_time
+
+    results = {}
+    yaml_path = os.path.join(directory, 'benchmark_yaml.yaml')
+    try:
+        pure_text, pure_seconds = timed(lambda: dump(records, pure=True, allow_unicode=True))
+        c_text, c_seconds = timed(lambda: dump(records, allow_unicode=True))
+        if c_text != pure_text:
+            raise AssertionError("C 实现与纯 Python 实现的输出不同")
+        results['dump'] = {'pure_seconds': pure_seconds, 'c_seconds': c_seconds}
+
+        with open(yaml_path, 'w', encoding='utf-8') as f:
+            f.write(c_text)
+        del pure_text, c_text
+
+        with open(yaml_path, 'r', encoding='utf-8') as f:
+            pure_data, pure_seconds = timed(lambda: load(f, pure=True))
+        with open(yaml_path, 'r', encoding='utf-8') as f:
+            c_data, c_seconds = timed(lambda: load(f))
+        if c_data != pure_data or c_data != records:
+            raise AssertionError("C 实现与纯 Python 实现的解析结果不同")
+        results['load'] = {'pure_seconds': pure_seconds, 'c_seconds': c_seconds}
+        del pure_data, c_data
+
+        def stream_load(loader_class):
+            with open(yaml_path, 'r', encoding='utf-8') as f:
+                loader = loader_class(f)
+                try:
+                    loader.get_event()  # StreamStartEvent
+                    loader.get_event()  # DocumentStartEvent
+                    loader.get_event()  # SequenceStartEvent
+                    count = 0
+                    while not loader.check_event(yaml.SequenceEndEvent):
+                        loader.construct_document(loader.compose_node(None, None))
+                        count += 1
+                    return count
+                finally:
+                    loader.dispose()
+
+        _, pure_seconds = timed(lambda: stream_load(yaml.SafeLoader))
+        _, c_seconds = timed(lambda: stream_load(StreamingSafeLoader))
+        results['stream'] = {'pure_seconds': pure_seconds, 'c_seconds': c_seconds}
+
+        clear_cache()
+        load_file(yaml_path)
+        _, cached_seconds = timed(lambda: load_file(yaml_path))
+    finally:
+        clear_cache()
+        if os.path.exists(yaml_path):
+            os.remove(yaml_path)
+
+    for r in results.values():
+        r['speedup'] = r['pure_seconds'] / r['c_seconds']
+    print(f"YAML 性能（{size / (1024 * 1024):.0f} MB，{len(records)} 条记录，libyaml：{LIBYAML_AVAILABLE}）：")
+    for operation, r in results.items():
+        print(f"  {operation:<8}纯 Python {r['pure_seconds']:>8.2f} 秒  C {r['c_seconds']:>8.2f} 秒"
+              f"  加速 {r['speedup']:.1f}x")
+    print(f"  缓存命中（深拷贝）{cached_seconds:.2f} 秒")
+    return results
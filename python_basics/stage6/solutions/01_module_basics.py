@@ -37,31 +37,134 @@ import os
 import json
 import yaml
 
+import time
+import threading
+from types import MappingProxyType
+
+# 有 libyaml 时使用 C 实现的加载器，速度是纯 Python 实现的数倍
+YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+def _file_signature(filename):
+    """文件的 (mtime_ns, size, inode)，不读取内容就能判断文件是否变化"""
+    stat = os.stat(filename)
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+def _freeze(value):
+    """把配置值转换为只读形式：字典 -> MappingProxyType，列表 -> 元组"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+def _parse_json(filename):
+    with open(filename, "r") as f:
+        return json.load(f)
+
+def _parse_yaml(filename):
+    data = {}
+    with open(filename, "r") as f:
+        for document in yaml.load_all(f, Loader=YamlLoader):
+            if document:
+                data.update(document)
+    return data
+
 class Config:
-    """配置管理类"""
-    def __init__(self):
+    """
+    配置管理类
+    配置由按加载顺序排列的来源（文件或字典）合并而成；读取时最多每 check_interval 秒
+    stat 一次已加载的文件，只有文件变化时才重新解析，并把变化的键通知订阅者
+    """
+    def __init__(self, check_interval=0.5):
         self.config = {}
+        self.snapshot = MappingProxyType({})  # 只读快照（嵌套的字典和列表也是只读的），变化时整体替换，读线程无需加锁
+        self.lock = threading.RLock()         # 重新加载和重建快照时持有
+        self.check_interval = check_interval
+        self.next_check = 0
+        self.layers = []       # 配置来源：文件名或字典
+        self.files = {}        # 文件名 -> [解析函数, (mtime_ns, size, inode), 数据]
+        self.subscribers = []
     
     def load_from_env(self):
         """从环境变量加载配置"""
+        env = {}
         for key, value in os.environ.items():
             if key.startswith("APP_"):
-                self.config[key[4:].lower()] = value
+                env[key[4:].lower()] = value
+        self.layers.append(env)
+        self._rebuild()
     
     def load_from_json(self, filename):
         """从JSON文件加载配置"""
-        with open(filename, "r") as f:
-            self.config.update(json.load(f))
+        self._load_file(filename, _parse_json)
     
     def load_from_yaml(self, filename):
-        """从YAML文件加载配置"""
-        with open(filename, "r") as f:
-            self.config.update(yaml.safe_load(f))
+        """从YAML文件加载配置（多文档文件按顺序合并）"""
+        self._load_file(filename, _parse_yaml)
     
     def merge_configs(self, *configs):
         """合并多个配置源"""
         for config in configs:
-            self.config.update(config)
+            self.layers.append(dict(config))
+        self._rebuild()
+    
+    def get(self, key, default=None):
+        """读取配置项，到了检查时间时先检查文件是否变化"""
+        if time.monotonic() >= self.next_check:
+            self.reload_changed()
+        return self.snapshot.get(key, default)
+    
+    def subscribe(self, callback):
+        """订阅配置变化，callback(changed) 的参数为 {键: (旧值, 新值)}，删除的键新值为 None"""
+        self.subscribers.append(callback)
+        return callback
+    
+    def reload_changed(self):
+        """重新解析发生变化的文件；解析失败时保留原来的数据"""
+        with self.lock:
+            self.next_check = time.monotonic() + self.check_interval
+            changed = False
+            for filename, entry in self.files.items():
+                try:
+                    signature = _file_signature(filename)
+                    if signature == entry[1]:
+                        continue
+                    entry[2] = entry[0](filename)
+                except (OSError, ValueError, yaml.YAMLError) as e:
+                    print(f"重新加载配置文件失败: {filename}: {e}")
+                    continue
+                entry[1] = signature
+                changed = True
+            if changed:
+                self._rebuild()
+    
+    def _load_file(self, filename, parse):
+        """加载配置文件，文件未变化时复用上次的解析结果"""
+        with self.lock:
+            signature = _file_signature(filename)
+            entry = self.files.get(filename)
+            if entry is None or entry[1] != signature:
+                self.files[filename] = [parse, signature, parse(filename)]
+            if filename not in self.layers:
+                self.layers.append(filename)
+            self._rebuild()
+    
+    def _rebuild(self):
+        """按顺序合并所有来源，发布新的快照并通知订阅者"""
+        with self.lock:
+            config = {}
+            for layer in self.layers:
+                config.update(self.files[layer][2] if isinstance(layer, str) else layer)
+            old, self.config = self.config, config
+            self.snapshot = _freeze(config)
+            changed = {key: (old.get(key), config.get(key))
+                       for key in old.keys() | config.keys()
+                       if key not in old or key not in config or old[key] != config[key]}
+        if changed:
+            for callback in list(self.subscribers):
+                callback(changed)
     
     def validate(self):
         """验证配置的有效性"""